@@ -1,16 +1,29 @@
 # library_management.py
-import json
-from typing import List, Dict
+import copy
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import List, Dict, Optional
 from datetime import datetime, timedelta
+from autocomplete import TitleTrie
+from change_feed import ChangeFeed
+from circulation_log import CirculationLog
+from fine_ledger import FineLedger, ledger_path, to_cents
+from json_stream import iter_json_array, iter_json_lines, line_chunks, JsonArrayWriter
+from library_stats import CirculationStats
+from user_store import UserStore, UserSnapshot
 
 # Represents a single book
 class Book:
-    def __init__(self, title: str, author: str):
+    def __init__(self, title: str, author: str, isbn: Optional[str] = None):
         self._title = title  # Book title
         self._author = author  # Author name
+        self._isbn = isbn or None  # Optional ISBN from the barcode
         self._is_borrowed = False  # Book status
         self._due_date = None  # Due date for return
         self._borrowed_date = None  # Date when borrowed
+        self._borrow_count = 0  # Times this book has been borrowed
 
     @property
     def title(self): return self._title
@@ -18,6 +31,9 @@ class Book:
     @property
     def author(self): return self._author
 
+    @property
+    def isbn(self): return self._isbn
+
     @property
     def is_borrowed(self): return self._is_borrowed
 
@@ -27,11 +43,15 @@ class Book:
     @property
     def borrowed_date(self): return self._borrowed_date
 
+    @property
+    def borrow_count(self): return self._borrow_count
+
     def borrow(self, days_to_return=14) -> bool:
         if not self._is_borrowed:
             self._is_borrowed = True
             self._borrowed_date = datetime.now()
             self._due_date = self._borrowed_date + timedelta(days=days_to_return)
+            self._borrow_count += 1
             return True
         return False
 
@@ -52,34 +72,47 @@ class Book:
     def __str__(self):
         status = "Borrowed" if self._is_borrowed else "Available"
         due_info = f", Due: {self._due_date.strftime('%Y-%m-%d')}" if self._due_date else ""
-        return f"📖 {self._title} by {self._author} - {status}{due_info}"
+        isbn_info = f" (ISBN: {self._isbn})" if self._isbn else ""
+        return f"📖 {self._title} by {self._author}{isbn_info} - {status}{due_info}"
 
     def to_dict(self):
         return {
             "title": self._title,
             "author": self._author,
+            "isbn": self._isbn,
             "is_borrowed": self._is_borrowed,
             "due_date": self._due_date.isoformat() if self._due_date else None,
-            "borrowed_date": self._borrowed_date.isoformat() if self._borrowed_date else None
+            "borrowed_date": self._borrowed_date.isoformat() if self._borrowed_date else None,
+            "borrow_count": self._borrow_count
         }
 
     @staticmethod
     def from_dict(data):
-        book = Book(data['title'], data['author'])
+        book = Book(data['title'], data['author'], data.get('isbn'))
         book._is_borrowed = data.get('is_borrowed', False)
         if data.get('due_date'):
             book._due_date = datetime.fromisoformat(data['due_date'])
         if data.get('borrowed_date'):
             book._borrowed_date = datetime.fromisoformat(data['borrowed_date'])
+        book._borrow_count = data.get('borrow_count', 0)
         return book
 
+    # Pickled as a plain tuple, which keeps handing books between processes cheap
+    def __getstate__(self):
+        return (self._title, self._author, self._isbn, self._is_borrowed,
+                self._due_date, self._borrowed_date, self._borrow_count)
+
+    def __setstate__(self, state):
+        (self._title, self._author, self._isbn, self._is_borrowed,
+         self._due_date, self._borrowed_date, self._borrow_count) = state
+
 # Represents a user
 class User:
     def __init__(self, name: str, user_id: str):
         self._name = name
         self._user_id = user_id
         self._borrowed_books: List[str] = []  # List of borrowed book titles
-        self._total_fine = 0
+        self._fine_cents = 0  # Outstanding fine in cents, avoids float drift
 
     @property
     def name(self): return self._name
@@ -91,7 +124,7 @@ class User:
     def borrowed_books(self): return self._borrowed_books[:]
 
     @property
-    def total_fine(self): return self._total_fine
+    def total_fine(self): return self._fine_cents / 100
 
     def add_borrowed_book(self, title: str):
         if title not in self._borrowed_books:
@@ -102,16 +135,17 @@ class User:
             self._borrowed_books.remove(title)
 
     def add_fine(self, amount: float):
-        self._total_fine += amount
+        self._fine_cents += to_cents(amount)
 
     def pay_fine(self, amount: float) -> bool:
-        if amount <= self._total_fine:
-            self._total_fine -= amount
+        cents = to_cents(amount)
+        if 0 < cents <= self._fine_cents:
+            self._fine_cents -= cents
             return True
         return False
 
     def __str__(self):
-        fine_info = f", Fine: ${self._total_fine}" if self._total_fine > 0 else ""
+        fine_info = f", Fine: ${self.total_fine:.2f}" if self._fine_cents > 0 else ""
         return f"👤 {self._name} (ID: {self._user_id}), Books: {len(self._borrowed_books)}{fine_info}"
 
     def to_dict(self):
@@ -119,113 +153,522 @@ class User:
             "name": self._name,
             "user_id": self._user_id,
             "borrowed_books": self._borrowed_books,
-            "total_fine": self._total_fine
+            "total_fine": self.total_fine
         }
 
     @staticmethod
     def from_dict(data):
         user = User(data['name'], data['user_id'])
         user._borrowed_books = data.get('borrowed_books', [])
-        user._total_fine = data.get('total_fine', 0)
+        user._fine_cents = to_cents(data.get('total_fine', 0))
         return user
 
+    def __getstate__(self):
+        return (self._name, self._user_id, self._borrowed_books, self._fine_cents)
+
+    def __setstate__(self, state):
+        self._name, self._user_id, self._borrowed_books, self._fine_cents = state
+
+# Parse part of a data file; runs in worker processes when loading in parallel
+def _load_books(path: str, start: Optional[int] = None, end: Optional[int] = None) -> List[Book]:
+    records = iter_json_array(path) if start is None else iter_json_lines(path, start, end)
+    return [Book.from_dict(data) for data in records]
+
+def _load_users(path: str, start: Optional[int] = None, end: Optional[int] = None) -> List[User]:
+    records = iter_json_array(path) if start is None else iter_json_lines(path, start, end)
+    return [User.from_dict(data) for data in records]
+
+# Raised inside a transaction to undo a partly applied batch
+class _Rollback(Exception):
+    pass
+
+# Read-only view of the library as it was when Library.snapshot() was called
+class LibrarySnapshot:
+    def __init__(self, books: Dict[str, Book], users, release):
+        self._books = books  # Shared with the library until it next writes
+        self._users = users
+        self._release = release
+        self._taken_at = datetime.now()
+
+    @property
+    def taken_at(self): return self._taken_at
+
+    def books(self) -> List[Book]:
+        return list(self._books.values())
+
+    def users(self) -> List[User]:
+        return list(self._users.values())
+
+    def get_book(self, title: str) -> Optional[Book]:
+        return self._books.get(title)
+
+    def get_user(self, user_id: str) -> Optional[User]:
+        return self._users.get(user_id)
+
+    def search_book(self, query: str) -> List[Book]:
+        query = query.lower()
+        return [book for book in self._books.values()
+                if query in book.title.lower() or query in book.author.lower()
+                or (book.isbn and query in book.isbn)]
+
+    def overdue_books(self) -> List[tuple]:
+        # (book, days overdue) as of when the snapshot was taken
+        return [(book, (self._taken_at - book.due_date).days) for book in self._books.values()
+                if book.is_borrowed and book.due_date and self._taken_at > book.due_date]
+
+    def display_all_books(self):
+        for book in self._books.values():
+            print(book)
+
+    def display_all_users(self):
+        for user in self._users.values():
+            print(user)
+
+    def __repr__(self):
+        return f"LibrarySnapshot({len(self._books)} books)"
+
+    def close(self):
+        # Lets the library stop copying on write once no report needs this view
+        self._release(self)
+        if isinstance(self._users, UserSnapshot):
+            self._users.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
 # Manages the library
 class Library:
-    def __init__(self, book_file='books.json', user_file='users.json'):
+    def __init__(self, book_file='books.json', user_file='users.json', log_dir=None,
+                 change_feed=None, fine_file=None, compression=None, load_workers=1, max_user_bytes=None,
+                 record_events=True):
         self._books: Dict[str, Book] = {}  # Book store by title
         self._users: Dict[str, User] = {}  # User store
+        if max_user_bytes:
+            # Only recently used users stay in memory, the rest wait in an indexed file beside users.json.
+            # The cap covers User records; fine balances and the fines ranking stay in memory for
+            # every user who owes, about 270 bytes each.
+            self._users = UserStore(os.path.splitext(user_file)[0] + '.users.db', max_user_bytes, User.from_dict)
+        self._books_by_isbn: Dict[str, Book] = {}  # Secondary index by ISBN
+        self._books_by_author: Dict[str, Dict[str, Book]] = {}  # Normalized author -> books by title
         self._data_file_books = book_file
         self._data_file_users = user_file
+        self._compression = compression  # None, 'gzip', 'bz2' or 'lzma' for saved files
+        self._load_workers = load_workers  # Processes used to parse the data files at start-up
+        # Circulation history, kept beside users.json unless told otherwise
+        self._log = (CirculationLog(log_dir or os.path.splitext(user_file)[0] + '.circulation_log')
+                     if record_events else None)
+        self._stats = CirculationStats()  # Live dashboard counters
+        self._completions = TitleTrie()  # Typeahead over titles and authors
+        self._feed = ChangeFeed(change_feed) if change_feed else None  # Tailed by read replicas
+        # With a bounded user store only balances stay in memory, statements are read from the journal
+        self._fines = FineLedger(fine_file or ledger_path(user_file), keep_entries=not max_user_bytes)
+        self._txn_depth = 0  # Nesting level of transaction() blocks
+        self._undo: List = []  # Rollback steps for the open transaction
+        self._pending: List = []  # Side effects held until the transaction commits
+        self._journal: List = []  # Fine ledger writes held until the transaction commits
+        self._save_pending = False  # Whether the open transaction changed anything users.json holds
+        self._fine_checked = set()  # Users whose opening balance the open transaction already settled
+        self._snapshots = weakref.WeakSet()  # Open LibrarySnapshots
+        self._shared_books = False  # True while _books may be referenced by a snapshot
+        self._shared_users = False
+        self._owned: set = set()  # ('book', title) / ('user', id) copied since the last snapshot
         self._load_data()
 
+    def _read_records(self, path: str, loader) -> List:
+        # Uncompressed files are stored one record per line, so they split into independent chunks
+        chunks = line_chunks(path, self._load_workers) if self._load_workers > 1 else None
+        if not chunks or len(chunks) == 1:
+            return loader(path)
+        with ProcessPoolExecutor(len(chunks)) as pool:
+            parts = pool.map(loader, [path] * len(chunks), *zip(*chunks))
+            return [record for part in parts for record in part]  # Merged in file order
+
     def _load_data(self):
         try:
-            with open(self._data_file_books, 'r') as bf:
-                books = json.load(bf)
-                for data in books:
-                    book = Book.from_dict(data)
-                    self._books[book.title] = book
+            for book in self._read_records(self._data_file_books, _load_books):
+                self._books[book.title] = book
+                self._index_book(book)
+                self._stats.book_added(book.title, book.borrow_count, book.is_borrowed)
+                self._completions.add(book.title, book.author, book.borrow_count)
         except FileNotFoundError:
             pass
 
+        bounded = isinstance(self._users, UserStore)
         try:
-            with open(self._data_file_users, 'r') as uf:
-                users = json.load(uf)
-                for data in users:
-                    user = User.from_dict(data)
+            # A bounded store is filled one record at a time, never holding every user at once
+            users = (map(User.from_dict, iter_json_array(self._data_file_users)) if bounded
+                     else self._read_records(self._data_file_users, _load_users))
+            for user in users:
+                if self._fines.has_entries(user.user_id):
+                    user._fine_cents = self._fines.balance(user.user_id)  # Ledger wins over users.json
+                if bounded:
+                    self._users.add_cold(user)
+                else:
                     self._users[user.user_id] = user
+                self._stats.fine_changed(user.user_id, user.total_fine)
         except FileNotFoundError:
             pass
+        if bounded:
+            self._users.flush()
 
     def _save_data(self):
-        with open(self._data_file_books, 'w') as bf:
-            json.dump([book.to_dict() for book in self._books.values()], bf, indent=2)
-        with open(self._data_file_users, 'w') as uf:
-            json.dump([user.to_dict() for user in self._users.values()], uf, indent=2)
+        # Records are encoded and compressed one at a time
+        with JsonArrayWriter(self._data_file_books, self._compression) as bf:
+            for book in self._books.values():
+                bf.write(book.to_dict())
+        with JsonArrayWriter(self._data_file_users, self._compression) as uf:
+            if isinstance(self._users, UserStore):
+                for data in self._users.encoded():
+                    uf.write_encoded(data)
+            else:
+                for user in self._users.values():
+                    uf.write(user.to_dict())
+        if self._feed:
+            self._feed.checkpoint()  # Replicas loading these files replay the feed from here
 
-    def add_book(self, book: Book) -> bool:
-        if book.title not in self._books:
-            self._books[book.title] = book
+    @staticmethod
+    def _normalize_author(author: str) -> str:
+        return ' '.join(author.lower().split())
+
+    def _index_book(self, book: Book):
+        if book.isbn:
+            self._books_by_isbn[book.isbn] = book
+        self._books_by_author.setdefault(self._normalize_author(book.author), {})[book.title] = book
+
+    def _unindex_book(self, book: Book):
+        if book.isbn:
+            self._books_by_isbn.pop(book.isbn, None)
+        author = self._normalize_author(book.author)
+        by_author = self._books_by_author.get(author, {})
+        by_author.pop(book.title, None)
+        if not by_author:
+            self._books_by_author.pop(author, None)
+
+    def _publish(self, kind: str, **changes):
+        if self._feed:
+            self._feed.publish(kind, **changes)
+
+    def _find_book(self, title_or_isbn: str) -> Optional[Book]:
+        # Exact title first, then a scanned barcode
+        return self._books.get(title_or_isbn) or self._books_by_isbn.get(title_or_isbn)
+
+    def find_by_isbn(self, isbn: str) -> Optional[Book]:
+        return self._books_by_isbn.get(isbn)
+
+    def find_by_author(self, author: str) -> List[Book]:
+        return list(self._books_by_author.get(self._normalize_author(author), {}).values())
+
+    @contextmanager
+    def transaction(self):
+        # Changes inside the block are saved once at the end, or undone on error
+        undo_mark, pending_mark, journal_mark = len(self._undo), len(self._pending), len(self._journal)
+        self._txn_depth += 1
+        try:
+            yield self
+        except BaseException:
+            while len(self._undo) > undo_mark:
+                self._undo.pop()()  # Undo newest first
+            del self._pending[pending_mark:]
+            del self._journal[journal_mark:]
+            raise
+        finally:
+            self._txn_depth -= 1
+            if self._txn_depth == 0:
+                self._fine_checked.clear()
+        if self._txn_depth == 0:
+            self._undo.clear()
+            journal, self._journal = self._journal, []
+            pending, self._pending = self._pending, []
+            save, self._save_pending = self._save_pending, False
+            self._persist(journal, save, pending)
+
+    def _on_rollback(self, undo):
+        if self._txn_depth:
+            self._undo.append(undo)
+
+    def _remember(self, record):
+        # Snapshot a Book or User so a failed transaction can put it back
+        if self._txn_depth:
+            state = {key: value[:] if isinstance(value, list) else value
+                     for key, value in vars(record).items()}
+            self._undo.append(lambda: vars(record).update(state))
+
+    def snapshot(self) -> LibrarySnapshot:
+        # O(1): the snapshot shares the current stores, writers copy what they change afterwards.
+        # Take it from the thread that writes, then hand it to any reader.
+        if self._txn_depth:
+            raise RuntimeError("snapshot() inside a transaction would see uncommitted changes")
+        bounded = isinstance(self._users, UserStore)
+        users = self._users.snapshot() if bounded else self._users  # The store's file keeps its own snapshot
+        view = LibrarySnapshot(self._books, users, self._snapshots.discard)
+        self._snapshots.add(view)
+        self._shared_books = True
+        self._shared_users = not bounded
+        self._owned = set()
+        return view
+
+    def _book_store(self) -> Dict[str, Book]:
+        # The books dict, copied first if a snapshot still holds it
+        if self._shared_books:
+            if self._snapshots:
+                self._books = dict(self._books)
+            self._shared_books = False
+        return self._books
+
+    def _user_store(self) -> Dict[str, User]:
+        if self._shared_users:
+            if self._snapshots:
+                self._users = dict(self._users)
+            self._shared_users = False
+        return self._users
+
+    def _own_book(self, book: Book) -> Book:
+        # Copy a book before changing it in place if a snapshot can still see it
+        if not self._snapshots or ('book', book.title) in self._owned:
+            return book
+        clone = copy.copy(book)
+        self._book_store()[book.title] = clone
+        self._unindex_book(book)
+        self._index_book(clone)
+        self._owned.add(('book', book.title))
+        return clone
+
+    def _own_user(self, user: User) -> User:
+        if isinstance(self._users, UserStore):
+            # Mark it for write-back, and after a rollback put the restored copy back in the store
+            self._users.touch(user)
+            self._on_rollback(lambda: self._users.touch(user))
+            return user
+        if not self._snapshots or ('user', user.user_id) in self._owned:
+            return user
+        clone = copy.copy(user)
+        clone._borrowed_books = user._borrowed_books[:]
+        self._user_store()[user.user_id] = clone
+        self._owned.add(('user', user.user_id))
+        return clone
+
+    def _put_book(self, book: Book):
+        self._book_store()[book.title] = book
+        self._index_book(book)
+
+    def _drop_book(self, book: Book):
+        del self._book_store()[book.title]
+        self._unindex_book(book)
+        self._owned.discard(('book', book.title))
+
+    def _put_user(self, user: User):
+        self._user_store()[user.user_id] = user
+
+    def _drop_user(self, user: User):
+        del self._user_store()[user.user_id]
+        self._owned.discard(('user', user.user_id))
+
+    def _open_fine_account(self, user: User):
+        # A fine carried over from users.json enters the ledger when the user's fine first changes,
+        # so loading never writes. Inside a transaction only the first change may open it: by the
+        # next one the fine in memory already holds accruals the ledger only gets at commit.
+        if user.user_id in self._fine_checked:
+            return
+        if self._txn_depth:
+            self._fine_checked.add(user.user_id)
+        if user.total_fine > 0 and not self._fines.has_entries(user.user_id):
+            self._fines.accrue(user.user_id, to_cents(user.total_fine), 'Opening balance')
+
+    def _persist(self, journal: List, save: bool, effects: List):
+        # The ledger is the durable record of fines, so it is written before the data files:
+        # a crash in between leaves users.json behind, and loading takes the ledger's balance
+        for write in journal:
+            write()
+        if save:
             self._save_data()
+        for effect in effects:
+            effect()
+
+    def _commit(self, *effects, ledger=None, save=True):
+        # Persist now, or at the end of the enclosing transaction
+        if self._txn_depth:
+            if ledger:
+                self._journal.append(ledger)
+            self._pending.extend(effects)
+            self._save_pending = self._save_pending or save
+            return
+        self._persist([ledger] if ledger else [], save, effects)
+
+    def add_book(self, book: Book) -> bool:
+        if book.title not in self._books and not (book.isbn and book.isbn in self._books_by_isbn):
+            self._put_book(book)
+            self._on_rollback(lambda: self._drop_book(book))
+            self._commit(lambda: self._stats.book_added(book.title, book.borrow_count, book.is_borrowed),
+                         lambda: self._completions.add(book.title, book.author, book.borrow_count),
+                         lambda: self._publish('book_added', books=[book]))
             return True
         return False
 
     def remove_book(self, title: str) -> bool:
-        if title in self._books and not self._books[title].is_borrowed:
-            del self._books[title]
-            self._save_data()
+        book = self._find_book(title)
+        if book and not book.is_borrowed:
+            title = book.title
+            self._drop_book(book)
+            self._on_rollback(lambda: self._put_book(book))
+            self._commit(lambda: self._stats.book_removed(title),
+                         lambda: self._completions.remove(title),
+                         lambda: self._publish('book_removed', removed_books=[title]))
             return True
         return False
 
     def register_user(self, user: User) -> bool:
         if user.user_id not in self._users:
-            self._users[user.user_id] = user
-            self._save_data()
+            self._put_user(user)
+            self._on_rollback(lambda: self._drop_user(user))
+            self._commit(lambda: self._publish('user_registered', users=[user]))
             return True
         return False
 
     def remove_user(self, user_id: str) -> bool:
         user = self._users.get(user_id)
         if user and not user.borrowed_books and user.total_fine == 0:
-            del self._users[user_id]
-            self._save_data()
+            self._drop_user(user)
+            self._on_rollback(lambda: self._put_user(user))
+            self._commit(lambda: self._stats.user_removed(user_id),
+                         lambda: self._publish('user_removed', removed_users=[user_id]))
             return True
         return False
 
     def borrow_book(self, title: str, user_id: str, days_to_return=14) -> bool:
-        book = self._books.get(title)
+        book = self._find_book(title)
         user = self._users.get(user_id)
         if book and user and not book.is_borrowed:
+            title = book.title
+            book, user = self._own_book(book), self._own_user(user)
+            self._remember(book)
+            self._remember(user)
             if book.borrow(days_to_return):
                 user.add_borrowed_book(title)
-                self._save_data()
+                borrowed_date = book.borrowed_date
+
+                def effects():
+                    self._stats.book_borrowed(title)
+                    self._completions.update_score(title, book.borrow_count)
+                    self._publish('loan_opened', books=[book], users=[user])
+                    if self._log:
+                        self._log.record('borrow', title, user_id, when=borrowed_date)
+                self._commit(effects)
                 return True
         return False
 
     def return_book(self, title: str, user_id: str) -> tuple:
-        book = self._books.get(title)
+        book = self._find_book(title)
         user = self._users.get(user_id)
-        if book and user and title in user.borrowed_books:
+        if book and user and book.title in user.borrowed_books:
+            title = book.title
+            book, user = self._own_book(book), self._own_user(user)
+            self._open_fine_account(user)
+            self._remember(book)
+            self._remember(user)
             success, fine = book.return_book()
             if success:
                 user.remove_borrowed_book(title)
                 if fine > 0:
                     user.add_fine(fine)
-                self._save_data()
+
+                def effects():
+                    self._stats.book_returned(title)
+                    self._stats.fine_changed(user_id, user.total_fine)
+                    self._publish('loan_closed', books=[book], users=[user], fine=fine)
+                    if self._log:
+                        self._log.record('return', title, user_id)
+                        if fine > 0:
+                            self._log.record('fine', title, user_id, fine)
+                self._commit(effects, ledger=(lambda: self._fines.accrue(user_id, to_cents(fine), title))
+                             if fine > 0 else None)
                 return True, fine
         return False, 0
 
     def pay_fine(self, user_id: str, amount: float) -> bool:
         user = self._users.get(user_id)
+        if user:
+            user = self._own_user(user)
+            self._open_fine_account(user)
+            self._remember(user)
         if user and user.pay_fine(amount):
-            self._save_data()
+            def effects():
+                self._stats.fine_changed(user_id, user.total_fine)
+                self._publish('fine_changed', users=[user])
+                if self._log:
+                    self._log.record('payment', None, user_id, amount)
+            # Only the ledger is written: users.json catches up at the next save, and loading
+            # takes the ledger's balance until then
+            self._commit(effects, ledger=lambda: self._fines.pay(user_id, to_cents(amount)), save=False)
             return True
         return False
 
+    def waive_fine(self, user_id: str, amount: Optional[float] = None, note='') -> bool:
+        user = self._users.get(user_id)
+        if user:
+            user = self._own_user(user)
+            self._open_fine_account(user)
+            self._remember(user)
+            amount = user.total_fine if amount is None else amount
+        if user and user.pay_fine(amount):
+            def effects():
+                self._stats.fine_changed(user_id, user.total_fine)
+                self._publish('fine_changed', users=[user])
+            self._commit(effects, ledger=lambda: self._fines.waive(user_id, to_cents(amount), note), save=False)
+            return True
+        return False
+
+    def fine_statement(self, user_id: str, start: Optional[datetime] = None,
+                       end: Optional[datetime] = None) -> List[dict]:
+        user = self._users.get(user_id)
+        if start is None and user and user.total_fine > 0 and not self._fines.has_entries(user_id):
+            # Balance from users.json not yet in the ledger, dated when it first changes
+            return [{"time": None, "kind": "accrual", "amount": user.total_fine,
+                     "note": "Opening balance", "balance": user.total_fine}]
+        return self._fines.statement(user_id, start, end)
+
+    def borrow_many(self, titles: List[str], user_id: str, days_to_return=14) -> bool:
+        # All books are borrowed or none are
+        try:
+            with self.transaction():
+                for title in titles:
+                    if not self.borrow_book(title, user_id, days_to_return):
+                        raise _Rollback(title)
+        except _Rollback:
+            return False
+        return True
+
+    def return_many(self, titles: List[str], user_id: str) -> tuple:
+        total_fine = 0
+        try:
+            with self.transaction():
+                for title in titles:
+                    success, fine = self.return_book(title, user_id)
+                    if not success:
+                        raise _Rollback(title)
+                    total_fine += fine
+        except _Rollback:
+            return False, 0
+        return True, total_fine
+
+    def suggest(self, prefix: str, k=5) -> List[str]:
+        # Titles whose title or author starts with prefix, most borrowed first
+        return self._completions.complete(prefix, k)
+
+    def stats(self, top=5) -> dict:
+        return self._stats.summary(top)
+
+    def user_cache_stats(self) -> Optional[dict]:
+        # Hit rate and resident size of the bounded user store, None when every user is in memory
+        return self._users.metrics() if isinstance(self._users, UserStore) else None
+
     def search_book(self, query: str) -> List[Book]:
         query = query.lower()
         return [book for book in self._books.values()
-                if query in book.title.lower() or query in book.author.lower()]
+                if query in book.title.lower() or query in book.author.lower()
+                or (book.isbn and query in book.isbn)]
 
     def display_all_books(self):
         for book in self._books.values():
@@ -246,8 +689,26 @@ class Library:
         else:
             print("❌ User not found.")
 
+def ask_title(lib, prompt: str) -> str:
+    # Typing a prefix followed by '?' lists matching titles, then asks again
+    while True:
+        text = input(prompt)
+        if not text.endswith('?'):
+            return text
+        hints = lib.suggest(text[:-1])
+        if hints:
+            print("💡 Did you mean: " + " | ".join(hints))
+        else:
+            print("💡 No titles start with that, try a shorter prefix!")
+
 def main():
     lib = Library()
+    if os.environ.get('LIBRARY_RECORD'):
+        # Opt-in workload capture for library_replay.py
+        import atexit
+        from library_replay import RecordingLibrary
+        lib = RecordingLibrary(lib, os.environ['LIBRARY_RECORD'])
+        atexit.register(lib.close)  # Finish the gzip stream however the session ends
     print("🌟 Welcome to Our Friendly Library! 🌟")
     
     while True:
@@ -263,7 +724,9 @@ def main():
         print("9. Show All Users 👥")
         print("10. Show My Books 📖")
         print("11. Pay Fine 💰")
-        print("12. Exit 👋")
+        print("12. Library Stats 📊")
+        print("13. Fine Statement 🧾")
+        print("14. Exit 👋")
         
         choice = input("Enter your choice: ")
 
@@ -271,13 +734,14 @@ def main():
             if choice == '1':
                 title = input("📖 Book title: ")
                 author = input("✍️ Author name: ")
-                if lib.add_book(Book(title, author)):
+                isbn = input("🔢 ISBN (optional): ").strip()
+                if lib.add_book(Book(title, author, isbn)):
                     print("🎉 Yay! Book added successfully! 📚✨")
                 else:
                     print("😅 Oops! This book already exists!")
 
             elif choice == '2':
-                title = input("📖 Book title to remove: ")
+                title = ask_title(lib, "📖 Book title or ISBN to remove (end with ? for hints): ")
                 if lib.remove_book(title):
                     print("🗑️ Book removed successfully! All clean! ✨")
                 else:
@@ -299,14 +763,14 @@ def main():
                     print("😕 Couldn't remove user. Check if they have books or fines!")
 
             elif choice == '5':
-                title = input("📖 Book title to borrow: ")
+                title = ask_title(lib, "📖 Book title or ISBN to borrow (end with ? for hints): ")
                 user_id = input("🆔 Your User ID: ")
                 
                 # Check if user is registered
                 if user_id not in lib._users:
                     print("❌ User not registered! Please register first.")
                 elif lib.borrow_book(title, user_id):
-                    book = lib._books.get(title)
+                    book = lib._find_book(title)
                     if book:
                         due_date = book.due_date.strftime('%Y-%m-%d')
                         print("🎉 Book borrowed successfully! Happy reading! 📚")
@@ -315,7 +779,7 @@ def main():
                     print("😕 Couldn't borrow the book. Is it available?")
 
             elif choice == '6':
-                title = input("📖 Book title to return: ")
+                title = ask_title(lib, "📖 Book title or ISBN to return (end with ? for hints): ")
                 user_id = input("🆔 Your User ID: ")
                 success, fine = lib.return_book(title, user_id)
                 if success:
@@ -363,6 +827,31 @@ def main():
                     print("😕 Payment failed. Check your details!")
 
             elif choice == '12':
+                stats = lib.stats()
+                print("📊 Library at a glance:")
+                print(f"📚 Books: {stats['total_books']} ({stats['borrowed_books']} borrowed, "
+                      f"{stats['available_books']} available)")
+                print(f"📈 Utilization: {stats['utilization']:.1%}")
+                print("🏆 Most borrowed:")
+                for title, count in stats['top_titles']:
+                    print(f"   {title} - {count} times")
+                print(f"💰 Outstanding fines: ${stats['outstanding_fines']}")
+                for user_id, fine in stats['top_fines']:
+                    print(f"   {user_id} - ${fine}")
+
+            elif choice == '13':
+                user_id = input("🆔 Your User ID: ")
+                entries = lib.fine_statement(user_id)
+                if entries:
+                    print("🧾 Your fine statement:")
+                    for entry in entries:
+                        when = entry['time'].strftime('%Y-%m-%d') if entry['time'] else 'carried   '
+                        print(f"{when}  {entry['kind']:<8} "
+                              f"${entry['amount']:.2f}  balance ${entry['balance']:.2f}  {entry['note']}")
+                else:
+                    print("🎉 No fines on record!")
+
+            elif choice == '14':
                 print("👋 Thank you for visiting our library! Come back soon! 🌟")
                 break
             else:
@@ -0,0 +1,125 @@
+# autocomplete.py
+from typing import List, Dict, Set
+
+def normalize(text: str) -> str:
+    return ' '.join(text.lower().split())
+
+# One node of the compressed trie; the edge leading here is labelled with a whole substring
+class _Node:
+    __slots__ = ('label', 'children', 'titles', 'top')
+
+    def __init__(self, label=''):
+        self.label = label
+        self.children: Dict[str, '_Node'] = {}  # First character of the child's label -> child
+        self.titles: Set[str] = set()  # Titles whose key ends exactly here
+        self.top: List[str] = []  # Best titles anywhere below, most borrowed first
+
+# Prefix search over titles and authors, ranked by how often each book is borrowed
+class TitleTrie:
+    def __init__(self, top_k=10):
+        self._root = _Node()
+        self._top_k = top_k  # Completions cached per node
+        self._scores: Dict[str, int] = {}  # Title -> borrow count
+        self._keys: Dict[str, List[str]] = {}  # Title -> normalized keys it is filed under
+
+    def _path(self, key: str, create=False) -> List[_Node]:
+        # Nodes from the root down to where key ends, splitting edges when inserting
+        node, path, rest = self._root, [self._root], key
+        while rest:
+            child = node.children.get(rest[0])
+            if child is None:
+                if not create:
+                    return []
+                child = node.children[rest[0]] = _Node(rest)
+            if rest.startswith(child.label):
+                common = len(child.label)  # Usual case, the whole edge matches
+            else:
+                common = 0
+                while common < min(len(rest), len(child.label)) and rest[common] == child.label[common]:
+                    common += 1
+            if common < len(child.label):
+                if not create:
+                    return []
+                middle = _Node(child.label[:common])  # Split the edge at the shared part
+                child.label = child.label[common:]
+                middle.children[child.label[0]] = child
+                middle.top = child.top[:]
+                node.children[middle.label[0]] = middle
+                child = middle
+            node, rest = child, rest[common:]
+            path.append(node)
+        return path
+
+    def _refresh(self, path: List[_Node]):
+        # Rebuild the cached rankings bottom-up along one key's path
+        for node in reversed(path):
+            candidates = set(node.titles)
+            for child in node.children.values():
+                candidates.update(child.top)
+            node.top = sorted(candidates, key=lambda t: (-self._scores[t], t))[:self._top_k]
+
+    def _promote(self, path: List[_Node], title: str):
+        # A new or higher score can only move the title up, so insert it in place
+        rank = (-self._scores[title], title)
+        for node in path:
+            top = node.top
+            if title in top:
+                top.remove(title)
+            elif len(top) == self._top_k and rank > (-self._scores[top[-1]], top[-1]):
+                continue
+            i = 0
+            while i < len(top) and (-self._scores[top[i]], top[i]) < rank:
+                i += 1
+            top.insert(i, title)
+            del top[self._top_k:]
+
+    def add(self, title: str, author: str, score=0):
+        if title in self._scores:
+            self.remove(title)
+        self._scores[title] = score
+        self._keys[title] = list(dict.fromkeys([normalize(title), normalize(author)]))
+        for key in self._keys[title]:
+            path = self._path(key, create=True)
+            path[-1].titles.add(title)
+            self._promote(path, title)
+
+    def remove(self, title: str):
+        paths = [self._path(key) for key in self._keys.pop(title, [])]
+        self._scores.pop(title, None)
+        stale = []
+        for path in paths:
+            if path:
+                path[-1].titles.discard(title)
+            for node in path:
+                if title in node.top:
+                    node.top.remove(title)
+                    stale.append(node)
+        for path in paths:
+            # Drop leaves that no longer lead anywhere, then re-rank where the title was listed
+            while len(path) > 1 and not path[-1].titles and not path[-1].children:
+                node = path.pop()
+                path[-1].children.pop(node.label[0], None)
+            self._refresh([node for node in path if node in stale])
+
+    def update_score(self, title: str, score: int):
+        if title in self._scores:
+            grew = score >= self._scores[title]
+            self._scores[title] = score
+            for key in self._keys[title]:
+                path = self._path(key)
+                self._promote(path, title) if grew else self._refresh(path)
+
+    def complete(self, prefix: str, k=5) -> List[str]:
+        node, rest = self._root, normalize(prefix)
+        while rest:
+            child = node.children.get(rest[0])
+            if child is None:
+                return []
+            if rest.startswith(child.label):
+                rest = rest[len(child.label):]
+            elif child.label.startswith(rest):
+                rest = ''  # Prefix ends inside this edge
+            else:
+                return []
+            node = child
+        return node.top[:k]
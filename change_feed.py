@@ -0,0 +1,103 @@
+# change_feed.py
+import json
+import os
+from typing import Iterable, Optional
+from datetime import datetime
+
+CHANGE_KINDS = ('book_added', 'book_removed', 'user_registered', 'user_removed',
+                'loan_opened', 'loan_closed', 'fine_changed')
+
+def read_last_change(path: str) -> Optional[dict]:
+    # Parse only the tail of the feed to find the newest complete change
+    try:
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            block = 1 << 12
+            while True:
+                f.seek(max(0, size - block))
+                tail = f.read(size - f.tell())
+                lines = tail.split(b'\n')[:-1]  # Drop a partially written last line
+                if len(lines) > 1 or block >= size:
+                    return json.loads(lines[-1]) if lines and lines[-1] else None
+                block *= 2
+    except FileNotFoundError:
+        return None
+
+def read_checkpoint(path: str) -> int:
+    # Sequence number of the newest change the saved data files are known to include
+    try:
+        with open(path + '.checkpoint', 'r', encoding='utf-8') as f:
+            return json.load(f)['seq']
+    except (FileNotFoundError, ValueError):
+        return 0  # Unknown, replay the whole feed
+
+def offset_after(path: str, seq: int) -> int:
+    # Byte offset of the first change numbered above seq, found by bisecting the feed
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return 0
+    with f:
+        def line_at(offset):
+            f.seek(offset)
+            line = f.readline()
+            return line if line.endswith(b'\n') else None  # None for a half-written line
+
+        def next_start(offset):
+            if offset == 0:
+                return 0
+            f.seek(offset - 1)
+            f.readline()
+            return f.tell()
+
+        lo, hi = 0, f.seek(0, os.SEEK_END)  # Both line starts; rows before lo are at or below seq
+        while lo < hi:
+            start = next_start((lo + hi) // 2)
+            if start >= hi:
+                start = lo  # No line starts in the upper half, test the one at lo
+            line = line_at(start)
+            if line is None or json.loads(line)['seq'] > seq:
+                hi = start
+            else:
+                lo = start + len(line)
+        return lo
+
+# Ordered, append-only log of Library mutations for replicas to tail
+class ChangeFeed:
+    def __init__(self, path='changes.jsonl'):
+        self._path = path
+        last = read_last_change(path)
+        self._seq = last['seq'] if last else 0  # Continue numbering after a restart
+
+    @property
+    def path(self): return self._path
+
+    @property
+    def seq(self): return self._seq
+
+    def publish(self, kind: str, books: Iterable = (), users: Iterable = (),
+                removed_books: Iterable[str] = (), removed_users: Iterable[str] = (), **detail):
+        if kind not in CHANGE_KINDS:
+            raise ValueError(f"Unknown change kind: {kind}")
+        # Changed records are shipped whole, so replaying a change twice is harmless
+        self._seq += 1
+        change = {
+            "seq": self._seq,
+            "ts": datetime.now().isoformat(),
+            "kind": kind,
+            "books": [book.to_dict() for book in books],
+            "users": [user.to_dict() for user in users],
+            "removed_books": list(removed_books),
+            "removed_users": list(removed_users)
+        }
+        change.update(detail)
+        with open(self._path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(change, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+    def checkpoint(self):
+        # Called after the data files are saved: they hold every change published so far
+        temp = self._path + '.checkpoint.tmp'
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump({"seq": self._seq, "ts": datetime.now().isoformat()}, f)
+        os.replace(temp, self._path + '.checkpoint')
@@ -0,0 +1,152 @@
+# circulation_log.py
+import bisect
+import json
+import os
+from typing import List, Dict, Optional
+from datetime import datetime
+
+EVENT_KINDS = ('borrow', 'return', 'fine', 'payment')
+FIELDS = {'title': 2, 'user': 3}  # Indexed keys and their position in a row
+
+_BLOCK = 128  # Index lines per directory entry
+_MIN_TAIL = 1 << 16  # Unindexed bytes scanned before the index is rebuilt
+
+# Append-only store of circulation events, one partition file per month
+class CirculationLog:
+    def __init__(self, directory='circulation_log'):
+        self._directory = directory
+        self._indexes: Dict[str, dict] = {}  # Partition name -> offset index
+
+    def _path(self, name: str, suffix='.jsonl'):
+        return os.path.join(self._directory, name + suffix)
+
+    def _partitions(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[str]:
+        try:
+            names = sorted(f[:-len('.jsonl')] for f in os.listdir(self._directory) if f.endswith('.jsonl'))
+        except FileNotFoundError:
+            return []  # Nothing recorded yet
+        if start:
+            names = [n for n in names if n >= start.strftime('%Y-%m')]
+        if end:
+            names = [n for n in names if n <= end.strftime('%Y-%m')]
+        return names
+
+    def _load_index(self, name: str) -> Optional[dict]:
+        try:
+            with open(self._path(name, '.idx.json'), 'r') as f:
+                index = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        path = self._path(name, '.idx')
+        if 'blocks' not in index or not os.path.exists(path) or os.path.getsize(path) != index['index_size']:
+            return None  # Older layout or half written
+        index['keys'] = [(field, key) for field, key, _ in index['blocks']]
+        return index
+
+    def _build_index(self, name: str) -> dict:
+        # One line per (field, key) with its row offsets, sorted so a key is found by bisect
+        offsets: Dict[tuple, List[int]] = {}
+        size = 0
+        with open(self._path(name), 'rb') as f:
+            for line in f:
+                row = json.loads(line)
+                for field, column in FIELDS.items():
+                    if row[column] is not None:  # Payments are not tied to a book
+                        offsets.setdefault((field, row[column]), []).append(size)
+                size += len(line)
+        blocks = []  # Every _BLOCK-th key and where its line starts
+        with open(self._path(name, '.idx'), 'wb') as f:
+            for i, (field, key) in enumerate(sorted(offsets)):
+                if i % _BLOCK == 0:
+                    blocks.append([field, key, f.tell()])
+                f.write((json.dumps([field, key, offsets[field, key]], ensure_ascii=False,
+                                    separators=(',', ':')) + '\n').encode('utf-8'))
+            index = {'size': size, 'index_size': f.tell(), 'blocks': blocks}
+        with open(self._path(name, '.idx.json'), 'w') as f:
+            json.dump(index, f, separators=(',', ':'))
+        index['keys'] = [(field, key) for field, key, _ in blocks]
+        return index
+
+    def _index(self, name: str) -> dict:
+        # Only the small block directory is held in memory, the key lines stay on disk
+        index = self._indexes.get(name) or self._load_index(name)
+        size = os.path.getsize(self._path(name))
+        if index is None or index['size'] > size or size - index['size'] > max(_MIN_TAIL, index['size'] // 4):
+            index = self._build_index(name)  # Missing, stale or too far behind
+        self._indexes[name] = index
+        return index
+
+    def _offsets(self, name: str, field: str, key: str) -> List[int]:
+        index = self._index(name)
+        offsets = []
+        i = bisect.bisect_right(index['keys'], (field, key)) - 1
+        if i >= 0:
+            with open(self._path(name, '.idx'), 'rb') as f:
+                f.seek(index['blocks'][i][2])
+                for line in f:  # At most one block, the next one starts past the key
+                    line_field, line_key, line_offsets = json.loads(line)
+                    if (line_field, line_key) >= (field, key):
+                        if line_key == key and line_field == field:
+                            offsets = line_offsets
+                        break
+        # Rows appended since the index was built are matched by reading them
+        with open(self._path(name), 'rb') as f:
+            f.seek(index['size'])
+            offset = index['size']
+            for line in f:
+                if json.loads(line)[FIELDS[field]] == key:
+                    offsets.append(offset)
+                offset += len(line)
+        return offsets
+
+    def record(self, kind: str, title: str, user_id: str, amount: float = 0, when: Optional[datetime] = None):
+        if kind not in EVENT_KINDS:
+            raise ValueError(f"Unknown event kind: {kind}")
+        when = when or datetime.now()
+        name = when.strftime('%Y-%m')
+        row = [when.isoformat(), kind, title, user_id, amount]
+        line = (json.dumps(row, separators=(',', ':')) + '\n').encode('utf-8')
+        os.makedirs(self._directory, exist_ok=True)
+        with open(self._path(name), 'ab') as f:
+            f.write(line)  # Indexed lazily, the next query reads it from the tail
+
+    def _read_rows(self, name: str, title: Optional[str], user_id: Optional[str]):
+        with open(self._path(name), 'rb') as f:
+            if title is None and user_id is None:
+                for line in f:
+                    yield json.loads(line)
+                return
+            offsets = None
+            if title is not None:
+                offsets = self._offsets(name, 'title', title)
+            if user_id is not None:
+                user_offsets = self._offsets(name, 'user', user_id)
+                offsets = user_offsets if offsets is None else sorted(set(offsets) & set(user_offsets))
+            for offset in offsets:
+                f.seek(offset)
+                yield json.loads(f.readline())
+
+    def events(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+               title: Optional[str] = None, user_id: Optional[str] = None,
+               kind: Optional[str] = None) -> List[dict]:
+        results = []
+        for name in self._partitions(start, end):
+            for row in self._read_rows(name, title, user_id):
+                when = datetime.fromisoformat(row[0])
+                if (start and when < start) or (end and when > end) or (kind and row[1] != kind):
+                    continue
+                results.append({"time": when, "kind": row[1], "title": row[2],
+                                "user_id": row[3], "amount": row[4]})
+        results.sort(key=lambda e: e["time"])
+        return results
+
+    def last_borrower(self, title: str, before: Optional[datetime] = None) -> Optional[str]:
+        borrows = self.events(end=before, title=title, kind='borrow')
+        return borrows[-1]["user_id"] if borrows else None
+
+    def loans_per_day(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for event in self.events(start, end, kind='borrow'):
+            day = event["time"].strftime('%Y-%m-%d')
+            counts[day] = counts.get(day, 0) + 1
+        return counts
@@ -0,0 +1,99 @@
+# fine_ledger.py
+import bisect
+import json
+import os
+from typing import List, Dict, Optional
+from datetime import datetime
+
+ENTRY_KINDS = ('accrual', 'payment', 'waiver')
+
+def to_cents(amount: float) -> int:
+    return int(round(amount * 100))
+
+def ledger_path(user_file: str) -> str:
+    # Where a Library keeps the ledger for a users file unless told otherwise
+    return os.path.splitext(user_file)[0] + '.fines.jsonl'
+
+# Append-only journal of fines per user, amounts in whole cents
+class FineLedger:
+    def __init__(self, path='fines.jsonl', keep_entries=True):
+        self._path = path
+        self._keep_entries = keep_entries  # False keeps only balances, statements read the journal
+        self._entries: Dict[str, List[tuple]] = {}  # User ID -> (time, kind, cents, note, balance)
+        self._times: Dict[str, List[datetime]] = {}  # User ID -> entry times, for range lookups
+        self._balances: Dict[str, int] = {}  # User ID -> running balance in cents
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self._path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    when, user_id, kind, cents, note = json.loads(line)
+                    self._add(datetime.fromisoformat(when), user_id, kind, cents, note)
+        except FileNotFoundError:
+            pass  # No fines recorded yet
+
+    def _add(self, when: datetime, user_id: str, kind: str, cents: int, note: str):
+        balance = self._balances.get(user_id, 0) + (cents if kind == 'accrual' else -cents)
+        self._balances[user_id] = balance
+        if self._keep_entries:
+            self._entries.setdefault(user_id, []).append((when, kind, cents, note, balance))
+            self._times.setdefault(user_id, []).append(when)
+
+    def _read_entries(self, user_id: str) -> List[tuple]:
+        # One user's entries straight from the journal, for ledgers that do not keep them
+        entries, balance = [], 0
+        needle = json.dumps(user_id, ensure_ascii=False)
+        try:
+            with open(self._path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if needle not in line:
+                        continue  # Cheap filter before parsing
+                    when, entry_user, kind, cents, note = json.loads(line)
+                    if entry_user == user_id:
+                        balance += cents if kind == 'accrual' else -cents
+                        entries.append((datetime.fromisoformat(when), kind, cents, note, balance))
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def _append(self, user_id: str, kind: str, cents: int, note='', when: Optional[datetime] = None):
+        when = when or datetime.now()
+        with open(self._path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps([when.isoformat(), user_id, kind, cents, note], ensure_ascii=False) + '\n')
+        self._add(when, user_id, kind, cents, note)
+
+    def accrue(self, user_id: str, cents: int, note=''):
+        if cents > 0:
+            self._append(user_id, 'accrual', cents, note)
+
+    def pay(self, user_id: str, cents: int, note='') -> bool:
+        if 0 < cents <= self.balance(user_id):
+            self._append(user_id, 'payment', cents, note)
+            return True
+        return False
+
+    def waive(self, user_id: str, cents: Optional[int] = None, note='') -> bool:
+        cents = self.balance(user_id) if cents is None else cents  # Whole balance by default
+        if 0 < cents <= self.balance(user_id):
+            self._append(user_id, 'waiver', cents, note)
+            return True
+        return False
+
+    def balance(self, user_id: str) -> int:
+        return self._balances.get(user_id, 0)
+
+    def has_entries(self, user_id: str) -> bool:
+        return user_id in self._balances
+
+    def statement(self, user_id: str, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[dict]:
+        if self._keep_entries:
+            entries = self._entries.get(user_id, [])
+            times = self._times.get(user_id, [])
+        else:
+            entries = self._read_entries(user_id)
+            times = [entry[0] for entry in entries]
+        first = bisect.bisect_left(times, start) if start else 0
+        last = bisect.bisect_right(times, end) if end else len(times)
+        return [{"time": when, "kind": kind, "amount": cents / 100, "note": note, "balance": balance / 100}
+                for when, kind, cents, note, balance in entries[first:last]]
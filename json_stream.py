@@ -0,0 +1,142 @@
+# json_stream.py
+import bz2
+import codecs
+import gzip
+import json
+import lzma
+import os
+import re
+from typing import Iterator, List, Optional, Tuple
+
+# Stdlib codecs for compressed data files, recognised on read by their magic bytes
+COMPRESSIONS = {
+    'gzip': (gzip.open, b'\x1f\x8b'),
+    'bz2': (bz2.open, b'BZh'),
+    'lzma': (lzma.open, b'\xfd7zXZ\x00')
+}
+
+_WHITESPACE = re.compile(r'[\s,]*')
+_RECORD_GAP = re.compile(r'[\s,\[]*')  # A chunk may begin with the array's opening bracket
+
+def detect_compression(path: str) -> Optional[str]:
+    with open(path, 'rb') as f:
+        head = f.read(6)
+    for name, (_, magic) in COMPRESSIONS.items():
+        if head.startswith(magic):
+            return name
+    return None
+
+def open_data_file(path: str, mode='r', compression: Optional[str] = None):
+    # Reading picks the codec from the file itself, writing uses the one asked for
+    if 'r' in mode:
+        compression = detect_compression(path)
+    if compression is None:
+        return open(path, mode, encoding='utf-8')
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression: {compression}")
+    return COMPRESSIONS[compression][0](path, mode + 't', encoding='utf-8')
+
+def _iter_objects(read, buffer='', skip=_WHITESPACE, chunk_size=1 << 16) -> Iterator[dict]:
+    # Decode consecutive JSON objects from text handed out by read(), stopping at ']'
+    decoder = json.JSONDecoder()
+    pos = 0
+    eof = False
+    while True:
+        pos = skip.match(buffer, pos).end()
+        if buffer.startswith(']', pos) or (eof and pos == len(buffer)):
+            return
+        try:
+            obj, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk  # Keep only the unparsed tail
+            pos = 0
+            continue
+        yield obj
+        pos = end
+
+def iter_json_array(path: str, chunk_size=1 << 16) -> Iterator[dict]:
+    # Yield the objects of a top-level JSON array without reading the whole file
+    with open_data_file(path, 'r') as f:
+        buffer = f.read(chunk_size).lstrip()
+        if not buffer:
+            return  # Empty file
+        if not buffer.startswith('['):
+            raise ValueError(f"{path} does not hold a JSON array")
+        yield from _iter_objects(f.read, buffer[1:], chunk_size=chunk_size)
+
+# Writes a JSON array one record per line, optionally compressed on the fly.
+# Output goes to a temporary file that replaces path only once it is complete.
+class JsonArrayWriter:
+    def __init__(self, path: str, compression: Optional[str] = None):
+        self._path = path
+        self._temp = path + '.tmp'
+        self._file = open_data_file(self._temp, 'w', compression)
+        self._count = 0
+        self._file.write('[')
+
+    def write(self, record: dict):
+        self.write_encoded(json.dumps(record, ensure_ascii=False))
+
+    def write_encoded(self, text: str):
+        # A record that is already JSON text, copied through as is
+        self._file.write(',\n' if self._count else '\n')
+        self._file.write(text)
+        self._count += 1
+
+    def close(self):
+        self._file.write('\n]\n')
+        self._file.close()
+        os.replace(self._temp, self._path)  # Readers see the old file or the new one, never half of it
+
+    def discard(self):
+        self._file.close()
+        os.remove(self._temp)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+def line_chunks(path: str, parts: int) -> Optional[List[Tuple[int, int]]]:
+    # Byte ranges that split a one-record-per-line file, None if it cannot be split
+    if detect_compression(path):
+        return None
+    with open(path, 'rb') as f:
+        if f.readline().strip() != b'[':
+            return None
+        second = f.readline().strip()
+        if second != b']' and not (second.startswith(b'{') and second.rstrip(b',').endswith(b'}')):
+            return None  # Pretty-printed file from an older version
+        size = f.seek(0, os.SEEK_END)
+        bounds = [0]
+        for i in range(1, parts):
+            f.seek(max(bounds[-1], size * i // parts))
+            f.readline()  # Move to the start of the next record
+            bounds.append(f.tell())
+        bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if start < end]
+
+def iter_json_lines(path: str, start: int, end: int) -> Iterator[dict]:
+    # Records whose line starts inside [start, end) of a file split by line_chunks
+    decode = codecs.getincrementaldecoder('utf-8')().decode
+    with open(path, 'rb') as f:
+        f.seek(start)
+        left = end - start
+
+        def read(size):
+            nonlocal left
+            text = ''
+            while not text and left:
+                data = f.read(min(size, left))
+                left = left - len(data) if data else 0
+                text = decode(data, final=not left)
+            return text
+        yield from _iter_objects(read, skip=_RECORD_GAP)
@@ -0,0 +1,100 @@
+# library_federation.py
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import List, Dict, Optional, Tuple
+
+from Library_Management_System_Final import Library, Book
+
+_branch: Optional[Library] = None  # The branch owned by a worker process
+
+def _open_branch(book_file: str, user_file: str):
+    global _branch
+    _branch = Library(book_file, user_file, record_events=False)
+
+def _search(query: str) -> List[Book]:
+    return _branch.search_book(query)
+
+def _status(title: str) -> Optional[Book]:
+    return _branch._find_book(title)
+
+# One search across many branch libraries, each queried concurrently.
+# 'process' mode searches branches in parallel; 'thread' mode saves the start-up cost
+# but searching is CPU-bound, so under the GIL branches are in effect searched one after another.
+class LibraryFederation:
+    def __init__(self, branches: Dict[str, Tuple[str, str]], mode='process', max_workers=None):
+        if mode not in ('thread', 'process'):
+            raise ValueError("mode must be 'thread' or 'process'")
+        self._mode = mode
+        self._names = list(branches)
+        self.errors: Dict[str, str] = {}  # Branch -> why it was left out of the last query
+        if mode == 'process':
+            # A single-worker process per branch, so each branch is loaded exactly once
+            self._pools = {name: ProcessPoolExecutor(1, initializer=_open_branch, initargs=files)
+                           for name, files in branches.items()}
+        else:
+            self._pool = ThreadPoolExecutor(max_workers or len(branches) or 1)
+            loading = {name: self._pool.submit(Library, files[0], files[1], record_events=False)
+                       for name, files in branches.items()}
+            self._libraries: Dict[str, Library] = {}
+            self._load_errors: Dict[str, str] = {}  # Branches whose files could not be loaded
+            for name, future in loading.items():
+                try:
+                    self._libraries[name] = future.result()
+                except Exception as e:
+                    self._load_errors[name] = f"{type(e).__name__}: {e}"
+
+    @property
+    def branches(self): return self._names[:]
+
+    def _fan_out(self, remote, local, argument) -> Dict[str, object]:
+        # remote runs inside a branch's process, local is called on an in-process Library
+        self.errors = {} if self._mode == 'process' else dict(self._load_errors)
+        futures = {}
+        for name in self._names:
+            try:
+                if self._mode == 'process':
+                    futures[name] = self._pools[name].submit(remote, argument)
+                elif name in self._libraries:
+                    futures[name] = self._pool.submit(local, self._libraries[name], argument)
+            except Exception as e:
+                self.errors[name] = f"{type(e).__name__}: {e}"
+        results = {}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                self.errors[name] = f"{type(e).__name__}: {e}"  # Answer from the branches that did reply
+        return results
+
+    def search_book(self, query: str) -> List[Tuple[str, Book]]:
+        by_branch = self._fan_out(_search, Library.search_book, query)
+        results = [(name, book) for name, books in by_branch.items() for book in books]
+        results.sort(key=lambda item: (item[1].title.lower(), item[0]))
+        return results
+
+    def availability(self, title: str) -> Dict[str, str]:
+        # Status of one title (or ISBN) at every branch that holds it
+        statuses = {}
+        for name, book in self._fan_out(_status, Library._find_book, title).items():
+            if book is None:
+                continue
+            if book.is_borrowed:
+                statuses[name] = f"Borrowed, due {book.due_date.strftime('%Y-%m-%d')}" if book.due_date else "Borrowed"
+            else:
+                statuses[name] = "Available"
+        return statuses
+
+    def find_available(self, title: str) -> List[str]:
+        return [name for name, status in self.availability(title).items() if status == "Available"]
+
+    def close(self):
+        if self._mode == 'process':
+            for pool in self._pools.values():
+                pool.shutdown()
+        else:
+            self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,201 @@
+# library_fsck.py
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Iterator, Optional
+from datetime import datetime, timedelta
+
+from fine_ledger import FineLedger, ledger_path, to_cents
+from json_stream import iter_json_array, iter_json_lines, line_chunks, detect_compression, JsonArrayWriter
+
+# What each kind of problem means and how --repair fixes it
+CATEGORIES = {
+    'duplicate_book': "Title appears more than once (later copies dropped)",
+    'duplicate_user': "User ID appears more than once (later copies dropped)",
+    'orphan_loan': "Book is borrowed but no user holds it (marked available)",
+    'stale_dates': "Available book still has loan dates (dates cleared)",
+    'missing_due_date': "Borrowed book has no due date (due date set)",
+    'missing_book': "User holds a title that does not exist (removed from user)",
+    'unrecorded_loan': "User holds a title the book marks available (loan restored on the book)",
+    'multiple_holders': "Several users hold the same title (kept by the first user)",
+    'negative_fine': "User has a negative fine (reset to zero)",
+    'stale_fine': "Fine differs from the fine ledger, normal after payments (ledger balance written)"
+}
+
+def _scan_books(path: str, start: Optional[int] = None, end: Optional[int] = None) -> List[tuple]:
+    # Only the fields the cross-checks need, so results stay small across processes
+    records = iter_json_array(path) if start is None else iter_json_lines(path, start, end)
+    return [(data['title'], bool(data.get('is_borrowed')), bool(data.get('due_date')),
+             bool(data.get('borrowed_date'))) for data in records]
+
+def _scan_users(path: str, start: Optional[int] = None, end: Optional[int] = None) -> List[tuple]:
+    records = iter_json_array(path) if start is None else iter_json_lines(path, start, end)
+    return [(data['user_id'], data.get('borrowed_books', []), data.get('total_fine', 0)) for data in records]
+
+# Validates books against users in one pass over each file, optionally repairing them
+class LibraryChecker:
+    def __init__(self, book_file='books.json', user_file='users.json', jobs=1, examples=5, fine_file=None):
+        self._book_file = book_file
+        self._user_file = user_file
+        self._fine_file = fine_file or ledger_path(user_file)  # Holds the current fines, users.json can lag
+        self._jobs = jobs
+        self._examples = examples  # Sample messages kept per category
+        self.counts: Dict[str, int] = {}
+        self.samples: Dict[str, List[str]] = {}
+        # Repair plan, filled in by check()
+        self._drop_books = set()  # Positions of duplicate book records
+        self._drop_users = set()
+        self._free_books = set()  # Titles to mark available
+        self._restore_loans = set()  # Titles to mark borrowed
+        self._fix_due = set()  # Borrowed titles needing dates
+        self._drop_holdings: Dict[int, set] = {}  # User position -> titles to remove
+        self._zero_fines = set()
+        self._ledger_fines: Dict[int, float] = {}  # User position -> balance from the ledger
+
+    def _issue(self, category: str, message: str):
+        self.counts[category] = self.counts.get(category, 0) + 1
+        samples = self.samples.setdefault(category, [])
+        if len(samples) < self._examples:
+            samples.append(message)
+
+    def _scan(self, scanner, path: str) -> Iterator[tuple]:
+        if not os.path.exists(path):
+            return iter(())
+        chunks = line_chunks(path, self._jobs)
+        if not chunks:
+            return iter(scanner(path))  # Compressed or pretty-printed, parse it as one stream
+        if self._jobs == 1:
+            return iter(scanner(path, *chunks[0]))
+        with ProcessPoolExecutor(self._jobs) as pool:
+            parts = list(pool.map(scanner, [path] * len(chunks), *zip(*chunks)))  # In file order
+        return (record for part in parts for record in part)
+
+    def check(self) -> Dict[str, int]:
+        books: Dict[str, list] = {}  # Title -> [is_borrowed, has_due_date, holder]
+        records = self._scan(_scan_books, self._book_file)
+        for position, (title, borrowed, has_due, has_borrowed) in enumerate(records):
+            if title in books:
+                self._issue('duplicate_book', title)
+                self._drop_books.add(position)
+                continue
+            books[title] = [borrowed, has_due, None]
+            if not borrowed and (has_due or has_borrowed):
+                self._issue('stale_dates', title)
+            if borrowed and not has_due:
+                self._issue('missing_due_date', title)
+                self._fix_due.add(title)
+
+        ledger = FineLedger(self._fine_file, keep_entries=False)  # Balances only
+        seen_users = set()
+        for position, (user_id, titles, fine) in enumerate(self._scan(_scan_users, self._user_file)):
+            if user_id in seen_users:
+                self._issue('duplicate_user', user_id)
+                self._drop_users.add(position)
+                continue
+            seen_users.add(user_id)
+            if ledger.has_entries(user_id):
+                if to_cents(fine) != ledger.balance(user_id):
+                    balance = ledger.balance(user_id) / 100
+                    self._issue('stale_fine', f"{user_id}: {fine} in users file, {balance} in ledger")
+                    self._ledger_fines[position] = balance
+            elif fine < 0:
+                self._issue('negative_fine', f"{user_id}: {fine}")
+                self._zero_fines.add(position)
+            for title in titles:
+                state = books.get(title)
+                if state is None:
+                    self._issue('missing_book', f"{user_id} holds '{title}'")
+                elif state[2] is not None:
+                    self._issue('multiple_holders', f"'{title}' held by {state[2]} and {user_id}")
+                else:
+                    state[2] = user_id
+                    if not state[0]:
+                        self._issue('unrecorded_loan', f"{user_id} holds '{title}'")
+                        self._restore_loans.add(title)
+                    continue
+                self._drop_holdings.setdefault(position, set()).add(title)
+
+        for title, (borrowed, _, holder) in books.items():
+            if borrowed and holder is None:
+                self._issue('orphan_loan', title)
+                self._free_books.add(title)
+                self._fix_due.discard(title)
+        return self.counts
+
+    def _rewrite(self, path: str, fix):
+        # Stream the file through fix() into a temporary copy, then swap it in
+        temp = path + '.fsck'
+        with JsonArrayWriter(temp, detect_compression(path)) as out:
+            for position, data in enumerate(iter_json_array(path)):
+                data = fix(position, data)
+                if data is not None:
+                    out.write(data)
+        os.replace(temp, path)
+
+    def repair(self):
+        now = datetime.now()
+
+        def fix_book(position, data):
+            if position in self._drop_books:
+                return None
+            title = data['title']
+            if title in self._free_books:
+                data['is_borrowed'] = False
+            elif title in self._restore_loans:
+                data['is_borrowed'] = True
+                data['borrowed_date'] = now.isoformat()
+                data['due_date'] = (now + timedelta(days=14)).isoformat()
+            elif title in self._fix_due:
+                borrowed = datetime.fromisoformat(data['borrowed_date']) if data.get('borrowed_date') else now
+                data['borrowed_date'] = borrowed.isoformat()
+                data['due_date'] = (borrowed + timedelta(days=14)).isoformat()
+            if not data.get('is_borrowed'):
+                data['due_date'] = None
+                data['borrowed_date'] = None
+            return data
+
+        def fix_user(position, data):
+            if position in self._drop_users:
+                return None
+            dropped = self._drop_holdings.get(position)
+            if dropped:
+                data['borrowed_books'] = [title for title in data.get('borrowed_books', []) if title not in dropped]
+            if position in self._zero_fines:
+                data['total_fine'] = 0
+            elif position in self._ledger_fines:
+                data['total_fine'] = self._ledger_fines[position]
+            return data
+
+        if os.path.exists(self._book_file):
+            self._rewrite(self._book_file, fix_book)
+        if os.path.exists(self._user_file):
+            self._rewrite(self._user_file, fix_user)
+
+def main():
+    parser = argparse.ArgumentParser(description="Check books and users files for broken cross-references")
+    parser.add_argument('--books', default='books.json')
+    parser.add_argument('--users', default='users.json')
+    parser.add_argument('--fines', help="Fine ledger (default: beside the users file)")
+    parser.add_argument('--jobs', type=int, default=1, help="Parse files in this many processes")
+    parser.add_argument('--repair', action='store_true', help="Fix what was found, in place")
+    args = parser.parse_args()
+
+    checker = LibraryChecker(args.books, args.users, args.jobs, fine_file=args.fines)
+    counts = checker.check()
+    if not counts:
+        print("✅ No problems found.")
+        return
+    print("🔍 Problems found:")
+    for category, description in CATEGORIES.items():
+        if category in counts:
+            print(f"\n{category}: {counts[category]} - {description}")
+            for sample in checker.samples[category]:
+                print(f"   {sample}")
+    if args.repair:
+        checker.repair()
+        print("\n🔧 Repairs written.")
+    else:
+        print("\nRun again with --repair to fix these.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# library_replica.py
+import json
+import threading
+from typing import List, Dict, Optional
+from datetime import datetime
+
+from change_feed import read_last_change, read_checkpoint, offset_after
+from json_stream import iter_json_array
+from Library_Management_System_Final import Book, User
+
+# Read-only copy of a Library kept current by tailing the primary's change feed
+class LibraryReplica:
+    def __init__(self, feed_file='changes.jsonl', book_file='books.json', user_file='users.json'):
+        self._books: Dict[str, Book] = {}
+        self._users: Dict[str, User] = {}
+        self._feed_file = feed_file
+        self._offset = 0  # Bytes of the feed already applied
+        self._applied_seq = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        # Files are replaced atomically and only after the checkpoint they follow, so read it first
+        self._applied_seq = read_checkpoint(feed_file)
+        self._offset = offset_after(feed_file, self._applied_seq)
+        self._load_data(book_file, user_file)
+        # Replay the feed on top of the files to reach the primary's state, including fine payments
+        # the primary wrote only to its ledger
+        self.poll()
+
+    def _load_data(self, book_file: str, user_file: str):
+        try:
+            for data in iter_json_array(book_file):
+                self._books[data['title']] = Book.from_dict(data)
+        except FileNotFoundError:
+            pass
+        try:
+            for data in iter_json_array(user_file):
+                self._users[data['user_id']] = User.from_dict(data)
+        except FileNotFoundError:
+            pass
+
+    def _apply(self, change: dict):
+        for data in change['books']:
+            self._books[data['title']] = Book.from_dict(data)
+        for data in change['users']:
+            self._users[data['user_id']] = User.from_dict(data)
+        for title in change['removed_books']:
+            self._books.pop(title, None)
+        for user_id in change['removed_users']:
+            self._users.pop(user_id, None)
+        self._applied_seq = change['seq']
+
+    def poll(self) -> int:
+        applied = 0
+        try:
+            with open(self._feed_file, 'rb') as f:
+                f.seek(self._offset)
+                with self._lock:
+                    for line in f:  # One change at a time, however long the feed
+                        if not line.endswith(b'\n'):
+                            break  # Half-written, pick it up next time
+                        self._apply(json.loads(line))
+                        self._offset += len(line)
+                        applied += 1
+        except FileNotFoundError:
+            pass
+        return applied
+
+    def follow(self, interval=0.5) -> threading.Thread:
+        # Keep polling in the background until stop() is called
+        def run():
+            while not self._stop.wait(interval):
+                self.poll()
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self._stop.set()
+
+    def lag(self) -> dict:
+        last = read_last_change(self._feed_file)
+        primary_seq = last['seq'] if last else 0
+        behind = max(0, primary_seq - self._applied_seq)
+        seconds = 0.0
+        if behind:
+            # How long the oldest change not yet applied has been waiting
+            oldest = self._next_change()
+            if oldest:
+                seconds = max(0.0, (datetime.now() - datetime.fromisoformat(oldest['ts'])).total_seconds())
+        return {
+            "applied_seq": self._applied_seq,
+            "primary_seq": primary_seq,
+            "changes_behind": behind,
+            "seconds_behind": seconds
+        }
+
+    def _next_change(self) -> Optional[dict]:
+        try:
+            with open(self._feed_file, 'rb') as f:
+                f.seek(self._offset)
+                line = f.readline()
+        except FileNotFoundError:
+            return None
+        return json.loads(line) if line.endswith(b'\n') else None
+
+    def get_book(self, title: str) -> Optional[Book]:
+        return self._books.get(title)
+
+    def get_user(self, user_id: str) -> Optional[User]:
+        return self._users.get(user_id)
+
+    def search_book(self, query: str) -> List[Book]:
+        query = query.lower()
+        with self._lock:
+            return [book for book in self._books.values()
+                    if query in book.title.lower() or query in book.author.lower()
+                    or (book.isbn and query in book.isbn)]
+
+    def display_all_books(self):
+        with self._lock:
+            books = list(self._books.values())
+        for book in books:
+            print(book)
+
+    def display_all_users(self):
+        with self._lock:
+            users = list(self._users.values())
+        for user in users:
+            print(user)
+
+    def display_user_borrowed_books(self, user_id: str):
+        user = self._users.get(user_id)
+        if user:
+            if user.borrowed_books:
+                for title in user.borrowed_books:
+                    print(self._books.get(title))
+            else:
+                print("📚 No books borrowed!")
+        else:
+            print("❌ User not found.")
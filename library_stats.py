@@ -0,0 +1,137 @@
+# library_stats.py
+import bisect
+from typing import List, Dict, Tuple
+
+from fine_ledger import to_cents
+
+# Distinct ranking values in ascending order, held as short sorted runs so a change only shifts
+# one run: O(log n + run length) per add or remove, amortized over the occasional split
+class _SortedValues:
+    _RUN = 256  # Runs are split once they pass twice this length
+
+    def __init__(self):
+        self._runs: List[List[int]] = []
+        self._maxes: List[int] = []  # Largest value in each run, for finding the run
+
+    def add(self, value: int):
+        if not self._runs:
+            self._runs.append([value])
+            self._maxes.append(value)
+            return
+        i = min(bisect.bisect_left(self._maxes, value), len(self._runs) - 1)
+        run = self._runs[i]
+        bisect.insort(run, value)
+        self._maxes[i] = run[-1]
+        if len(run) > 2 * self._RUN:
+            self._runs[i:i + 1] = [run[:self._RUN], run[self._RUN:]]
+            self._maxes[i:i + 1] = [run[self._RUN - 1], run[-1]]
+
+    def remove(self, value: int):
+        i = bisect.bisect_left(self._maxes, value)
+        run = self._runs[i]
+        del run[bisect.bisect_left(run, value)]
+        if run:
+            self._maxes[i] = run[-1]
+        else:
+            del self._runs[i]
+            del self._maxes[i]
+
+    def __reversed__(self):
+        for run in reversed(self._runs):
+            yield from reversed(run)
+
+# Live circulation counters, kept up to date by the Library on every change
+class CirculationStats:
+    def __init__(self):
+        self._total_books = 0
+        self._borrowed_books = 0
+        self._borrow_counts: Dict[str, int] = {}  # Title -> times borrowed
+        self._by_count: Dict[int, Dict[str, None]] = {}  # Times borrowed -> titles
+        self._counts = _SortedValues()  # Distinct borrow counts
+        self._fines: Dict[str, int] = {}  # User ID -> outstanding fine in cents
+        self._by_fine: Dict[int, Dict[str, None]] = {}  # Cents owed -> user IDs
+        self._fine_amounts = _SortedValues()  # Distinct amounts owed
+        self._total_fines = 0  # Cents
+
+    @staticmethod
+    def _place(buckets: Dict[int, Dict[str, None]], keys: _SortedValues, item: str, value: int):
+        if value <= 0:
+            return  # Never-borrowed titles and users who owe nothing are not ranked
+        bucket = buckets.get(value)
+        if bucket is None:
+            bucket = buckets[value] = {}
+            keys.add(value)
+        bucket[item] = None
+
+    @staticmethod
+    def _unplace(buckets: Dict[int, Dict[str, None]], keys: _SortedValues, item: str, value: int):
+        bucket = buckets.get(value)
+        if bucket is None or item not in bucket:
+            return
+        del bucket[item]
+        if not bucket:
+            del buckets[value]
+            keys.remove(value)
+
+    @staticmethod
+    def _top(buckets: Dict[int, Dict[str, None]], keys: _SortedValues, k: int) -> List[Tuple[str, int]]:
+        top = []
+        for value in reversed(keys):
+            for item in buckets[value]:
+                if len(top) == k:
+                    return top
+                top.append((item, value))
+        return top
+
+    def book_added(self, title: str, borrow_count=0, is_borrowed=False):
+        self._total_books += 1
+        self._borrowed_books += 1 if is_borrowed else 0
+        self._borrow_counts[title] = borrow_count
+        self._place(self._by_count, self._counts, title, borrow_count)
+
+    def book_removed(self, title: str, is_borrowed=False):
+        self._total_books -= 1
+        self._borrowed_books -= 1 if is_borrowed else 0
+        self._unplace(self._by_count, self._counts, title, self._borrow_counts.pop(title, 0))
+
+    def book_borrowed(self, title: str):
+        count = self._borrow_counts.get(title, 0)
+        self._unplace(self._by_count, self._counts, title, count)
+        self._borrow_counts[title] = count + 1
+        self._place(self._by_count, self._counts, title, count + 1)
+        self._borrowed_books += 1
+
+    def book_returned(self, title: str):
+        self._borrowed_books -= 1
+
+    def fine_changed(self, user_id: str, total_fine: float):
+        cents = to_cents(total_fine)
+        old = self._fines.pop(user_id, 0)
+        self._unplace(self._by_fine, self._fine_amounts, user_id, old)
+        self._total_fines += cents - old
+        if cents > 0:
+            self._fines[user_id] = cents  # Only users who owe are tracked
+            self._place(self._by_fine, self._fine_amounts, user_id, cents)
+
+    def user_removed(self, user_id: str):
+        self.fine_changed(user_id, 0)
+
+    def top_titles(self, k=10) -> List[Tuple[str, int]]:
+        return self._top(self._by_count, self._counts, k)
+
+    def top_fines(self, k=10) -> List[Tuple[str, float]]:
+        return [(user_id, cents / 100) for user_id, cents in self._top(self._by_fine, self._fine_amounts, k)]
+
+    def utilization(self) -> float:
+        return self._borrowed_books / self._total_books if self._total_books else 0.0
+
+    def summary(self, k=5) -> dict:
+        return {
+            "total_books": self._total_books,
+            "borrowed_books": self._borrowed_books,
+            "available_books": self._total_books - self._borrowed_books,
+            "utilization": self.utilization(),
+            "top_titles": self.top_titles(k),
+            "outstanding_fines": self._total_fines / 100,
+            "top_fines": self.top_fines(k)
+        }
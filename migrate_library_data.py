@@ -0,0 +1,163 @@
+# migrate_library_data.py
+import argparse
+import hashlib
+from typing import Dict, Iterator, Optional
+from datetime import datetime, timedelta
+
+from fine_ledger import FineLedger, ledger_path
+from json_stream import iter_json_array, JsonArrayWriter
+
+# The three on-disk layouts in this repo:
+#   basic - Library_Management_System.py: books keyed by ISBN, no dates
+#   fine  - Library_Management_System_With_Fine.py: books keyed by ISBN, due dates and fines
+#   final - Library_Management_System_Final.py: books keyed by title, optional ISBN
+SCHEMAS = ('basic', 'fine', 'final')
+
+def _first(path: str) -> Optional[dict]:
+    try:
+        return next(iter_json_array(path), None)
+    except FileNotFoundError:
+        return None
+
+def detect_schema(books_path: str, users_path: str) -> Optional[str]:
+    # User records tell the layouts apart most reliably, so look there first
+    user = _first(users_path)
+    if user is not None:
+        if 'borrowed_books' in user:
+            return 'final'
+        return 'fine' if 'total_fine' in user else 'basic'
+    book = _first(books_path)
+    if book is not None:
+        if 'isbn' not in book or 'borrow_count' in book:
+            return 'final'
+        return 'fine' if 'due_date' in book else 'basic'
+    return None  # Nothing to look at
+
+def title_isbn(title: str) -> str:
+    # Stable stand-in ISBN for title-keyed books that never had one
+    return 'T' + hashlib.sha1(title.encode('utf-8')).hexdigest()[:12].upper()
+
+# Converts books then users between two layouts, one record at a time.
+# Records are streamed, but every output book key is remembered to catch duplicates, and the
+# old -> new key map covers every book when moving from an ISBN-keyed layout to final, so
+# memory grows with the number of books (roughly 100-200 bytes each), not with record size.
+# Migrating from final also holds the fine ledger's balances, one per user it mentions.
+class Migration:
+    def __init__(self, source: str, target: str, loan_start: Optional[datetime] = None, loan_days=14):
+        if source not in SCHEMAS or target not in SCHEMAS:
+            raise ValueError(f"Schema must be one of {', '.join(SCHEMAS)}")
+        self.source = source
+        self.target = target
+        self._loan_start = loan_start or datetime.now()
+        self._loan_days = loan_days
+        self._keys: Dict[str, str] = {}  # Old book key -> new key, only where they differ
+        self._seen = set()  # New book keys already written
+        self._dropped = set()  # Old keys of books dropped as duplicates
+        self._ledger: Optional[FineLedger] = None  # Current fines of a final layout, users.json can lag
+        self.report = {"books": 0, "users": 0, "renamed": 0, "dropped": 0, "loans_dropped": 0, "fines_dropped": 0}
+
+    def _new_key(self, data: dict) -> str:
+        if self.target == 'final':
+            return data['title']
+        return data.get('isbn') or title_isbn(data['title'])
+
+    def _old_key(self, data: dict) -> str:
+        return data['title'] if self.source == 'final' else data['isbn']
+
+    def convert_book(self, data: dict) -> Optional[dict]:
+        old_key = self._old_key(data)
+        key = self._new_key(data)
+        if key in self._seen:
+            if self.target != 'final':
+                self.report["dropped"] += 1  # Same ISBN twice, first record wins
+                self._dropped.add(old_key)
+                return None
+            key = f"{data['title']} [{old_key}]"  # Same title, disambiguate by ISBN
+            self.report["renamed"] += 1
+        self._seen.add(key)
+        if key != old_key:
+            self._keys[old_key] = key
+        book = {"title": key if self.target == 'final' else data['title'], "author": data['author']}
+        book["isbn"] = key if self.target != 'final' else data.get('isbn')
+        book["is_borrowed"] = data.get('is_borrowed', False)
+        if self.target != 'basic':
+            borrowed_date, due_date = data.get('borrowed_date'), data.get('due_date')
+            if book["is_borrowed"] and not due_date:
+                # Loans from the basic layout carry no dates, start them at migration time
+                borrowed_date = borrowed_date or self._loan_start.isoformat()
+                due_date = (datetime.fromisoformat(borrowed_date) + timedelta(days=self._loan_days)).isoformat()
+            book["due_date"] = due_date
+            book["borrowed_date"] = borrowed_date
+        if self.target == 'final':
+            book["borrow_count"] = data.get('borrow_count', 0)
+        self.report["books"] += 1
+        return book
+
+    def convert_user(self, data: dict) -> dict:
+        held = data.get('borrowed_books' if self.source == 'final' else 'borrowed_books_isbns', [])
+        kept = [key for key in held if key not in self._dropped]
+        self.report["loans_dropped"] += len(held) - len(kept)  # The book they pointed at is gone
+        held = [self._keys.get(key, key) for key in kept]
+        user = {"name": data['name'], "user_id": data['user_id']}
+        user["borrowed_books" if self.target == 'final' else "borrowed_books_isbns"] = held
+        fine = data.get('total_fine', 0)
+        if self._ledger and self._ledger.has_entries(data['user_id']):
+            fine = self._ledger.balance(data['user_id']) / 100
+        if self.target != 'basic':
+            user["total_fine"] = fine
+        elif fine:
+            self.report["fines_dropped"] += 1  # Basic layout has nowhere to keep fines
+        self.report["users"] += 1
+        return user
+
+    def run(self, books_in: str, users_in: str, books_out: str, users_out: str,
+            fine_file: Optional[str] = None) -> dict:
+        if self.source == 'final':
+            self._ledger = FineLedger(fine_file or ledger_path(users_in), keep_entries=False)
+        # Books first so user records can follow any renamed keys
+        with JsonArrayWriter(books_out) as out:
+            for data in _iter_or_empty(books_in):
+                book = self.convert_book(data)
+                if book is not None:
+                    out.write(book)
+        with JsonArrayWriter(users_out) as out:
+            for data in _iter_or_empty(users_in):
+                out.write(self.convert_user(data))
+        return self.report
+
+def _iter_or_empty(path: str) -> Iterator[dict]:
+    try:
+        yield from iter_json_array(path)
+    except FileNotFoundError:
+        return
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert library data between the three Library layouts")
+    parser.add_argument('--to', required=True, choices=SCHEMAS, dest='target')
+    parser.add_argument('--from', choices=SCHEMAS, dest='source', help="Source layout (detected if omitted)")
+    parser.add_argument('--books', default='books.json')
+    parser.add_argument('--users', default='users.json')
+    parser.add_argument('--out-books', required=True)
+    parser.add_argument('--out-users', required=True)
+    parser.add_argument('--fines', help="Fine ledger of a final layout (default: beside --users)")
+    parser.add_argument('--loan-days', type=int, default=14, help="Loan length for undated loans")
+    args = parser.parse_args()
+
+    source = args.source or detect_schema(args.books, args.users)
+    if source is None:
+        print("No data found to migrate.")
+        return
+    migration = Migration(source, args.target, loan_days=args.loan_days)
+    report = migration.run(args.books, args.users, args.out_books, args.out_users, args.fines)
+    print(f"Migrated {source} -> {args.target}: {report['books']} books, {report['users']} users")
+    if report["renamed"]:
+        print(f"{report['renamed']} duplicate titles renamed to 'Title [ISBN]'")
+    if report["dropped"]:
+        print(f"{report['dropped']} books with a duplicate ISBN dropped")
+    if report["loans_dropped"]:
+        print(f"Warning: {report['loans_dropped']} loans of dropped books removed from their users")
+    if report["fines_dropped"]:
+        print(f"Warning: {report['fines_dropped']} users had fines the basic layout cannot store")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+# test_autocomplete.py
+import unittest
+
+from autocomplete import TitleTrie
+
+class TitleTrieTest(unittest.TestCase):
+    def setUp(self):
+        self.trie = TitleTrie(top_k=3)
+        for title, author, score in [("Dune", "Herbert", 5), ("Dune Messiah", "Herbert", 2),
+                                     ("Dubliners", "Joyce", 9), ("Emma", "Austen", 1)]:
+            self.trie.add(title, author, score)
+
+    def test_ranks_by_score_on_titles_and_authors(self):
+        self.assertEqual(self.trie.complete("du"), ["Dubliners", "Dune", "Dune Messiah"])
+        self.assertEqual(self.trie.complete("DUNE  m"), ["Dune Messiah"])
+        self.assertEqual(self.trie.complete("herb"), ["Dune", "Dune Messiah"])
+        self.assertEqual(self.trie.complete("xyz"), [])
+
+    def test_follows_score_changes_and_removals(self):
+        self.trie.update_score("Dune Messiah", 10)
+        self.assertEqual(self.trie.complete("du", 1), ["Dune Messiah"])
+        self.trie.update_score("Dune Messiah", 0)
+        self.assertEqual(self.trie.complete("du"), ["Dubliners", "Dune", "Dune Messiah"])
+
+        self.trie.remove("Dubliners")
+        self.assertEqual(self.trie.complete("du"), ["Dune", "Dune Messiah"])
+        self.assertEqual(self.trie.complete("joyce"), [])
+
+    def test_keeps_only_top_k_per_prefix(self):
+        for i in range(10):
+            self.trie.add(f"Dust {i}", "Someone", i)
+        self.assertEqual(self.trie.complete("d", 10), ["Dubliners", "Dust 9", "Dust 8"])
+        self.trie.remove("Dust 9")
+        self.assertEqual(self.trie.complete("d", 10), ["Dubliners", "Dust 8", "Dust 7"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+# test_circulation_log.py
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from circulation_log import CirculationLog
+from Library_Management_System_Final import Library, Book, User
+
+class CirculationLogTest(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._dir.cleanup)
+        self.log = CirculationLog(os.path.join(self._dir.name, 'log'))
+        self.start = datetime(2025, 1, 1)
+        self.rows = []  # (time, kind, title, user) as recorded, spanning several monthly files
+        for i in range(3000):
+            when = self.start + timedelta(hours=i)
+            kind = ('borrow', 'return', 'payment')[i % 3]
+            title = None if kind == 'payment' else f"T{i % 97}"
+            user_id = f"U{i % 41}"
+            self.log.record(kind, title, user_id, when=when)
+            self.rows.append((when, kind, title, user_id))
+            if i == 2000:
+                self.log.events(user_id="U1")  # Index now, leaving later rows in the unindexed tail
+
+    def test_indexed_queries_match_a_full_scan(self):
+        for user_id in ("U0", "U40", "nobody"):
+            expected = [when for when, _, _, user in self.rows if user == user_id]
+            self.assertEqual([e["time"] for e in self.log.events(user_id=user_id)], expected)
+        expected = [when for when, _, title, user in self.rows if title == "T5" and user == "U5"]
+        self.assertEqual([e["time"] for e in self.log.events(title="T5", user_id="U5")], expected)
+
+    def test_time_range_and_last_borrower(self):
+        start, end = self.start + timedelta(days=20), self.start + timedelta(days=50)
+        expected = [when for when, kind, _, _ in self.rows if start <= when <= end and kind == 'borrow']
+        self.assertEqual([e["time"] for e in self.log.events(start, end, kind='borrow')], expected)
+        self.assertEqual(sum(self.log.loans_per_day(start, end).values()), len(expected))
+
+        borrowers = [user for _, kind, title, user in self.rows if kind == 'borrow' and title == "T5"]
+        self.assertEqual(self.log.last_borrower("T5"), borrowers[-1])
+        reopened = CirculationLog(os.path.join(self._dir.name, 'log'))
+        self.assertEqual(reopened.last_borrower("T5"), borrowers[-1])
+
+    def test_library_logs_beside_its_users_file(self):
+        users = os.path.join(self._dir.name, 'branch', 'users.json')
+        os.makedirs(os.path.dirname(users))
+        lib = Library(os.path.join(self._dir.name, 'branch', 'books.json'), users)
+        lib.add_book(Book("Dune", "Herbert"))
+        lib.register_user(User("A", "u0"))
+        lib.borrow_book("Dune", "u0")
+        log = CirculationLog(os.path.join(self._dir.name, 'branch', 'users.circulation_log'))
+        self.assertEqual(log.last_borrower("Dune"), "u0")
+
+if __name__ == "__main__":
+    unittest.main()
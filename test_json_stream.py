@@ -0,0 +1,69 @@
+# test_json_stream.py
+import json
+import os
+import tempfile
+import unittest
+
+from json_stream import (COMPRESSIONS, JsonArrayWriter, detect_compression, iter_json_array, iter_json_lines,
+                         line_chunks)
+
+class JsonStreamTest(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._dir.cleanup)
+        self.file = os.path.join(self._dir.name, 'data.json')
+        self.records = [{"title": f"Book {i}", "note": "ünïcode, [brackets] and }braces{" * (i % 3)}
+                        for i in range(500)]
+
+    def test_round_trip_in_every_compression(self):
+        for compression in [None] + list(COMPRESSIONS):
+            with self.subTest(compression=compression):
+                with JsonArrayWriter(self.file, compression) as out:
+                    for record in self.records:
+                        out.write(record)
+                self.assertEqual(detect_compression(self.file), compression)
+                self.assertEqual(list(iter_json_array(self.file, chunk_size=64)), self.records)
+
+    def test_reads_pretty_printed_and_empty_arrays(self):
+        with open(self.file, 'w', encoding='utf-8') as f:
+            json.dump(self.records, f, indent=4)
+        self.assertEqual(list(iter_json_array(self.file, chunk_size=100)), self.records)
+        with JsonArrayWriter(self.file):
+            pass
+        self.assertEqual(list(iter_json_array(self.file)), [])
+        with open(self.file, 'w', encoding='utf-8') as f:
+            f.write('{"not": "an array"}')
+        with self.assertRaises(ValueError):
+            list(iter_json_array(self.file))
+
+    def test_writer_keeps_old_file_until_complete(self):
+        with JsonArrayWriter(self.file) as out:
+            out.write({"n": 1})
+        with self.assertRaises(RuntimeError):
+            with JsonArrayWriter(self.file, 'gzip') as out:
+                out.write({"n": 2})
+                raise RuntimeError("crash mid-save")
+        self.assertEqual(list(iter_json_array(self.file)), [{"n": 1}])
+        self.assertFalse(os.path.exists(self.file + '.tmp'))
+
+    def test_line_chunks_cover_every_record_once(self):
+        with JsonArrayWriter(self.file) as out:
+            for record in self.records:
+                out.write(record)
+        for parts in (1, 3, 7, 2000):
+            with self.subTest(parts=parts):
+                chunks = line_chunks(self.file, parts)
+                self.assertLessEqual(len(chunks), parts)
+                records = [record for start, end in chunks for record in iter_json_lines(self.file, start, end)]
+                self.assertEqual(records, self.records)
+
+    def test_line_chunks_refuse_files_they_cannot_split(self):
+        with JsonArrayWriter(self.file, 'gzip') as out:
+            out.write({"n": 1})
+        self.assertIsNone(line_chunks(self.file, 2))
+        with open(self.file, 'w', encoding='utf-8') as f:
+            json.dump(self.records[:5], f, indent=2)
+        self.assertIsNone(line_chunks(self.file, 2))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,257 @@
+# test_library.py
+import json
+import os
+import tempfile
+import unittest
+
+from Library_Management_System_Final import Library, Book, User
+from json_stream import detect_compression
+from library_fsck import LibraryChecker
+
+# Library behaviour that spans its stores, indexes, stats and change feed
+class LibraryTestCase(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._dir.cleanup)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self._dir.name, name)
+
+    def library(self, **options) -> Library:
+        options.setdefault('record_events', False)
+        return Library(self.path('books.json'), self.path('users.json'), **options)
+
+    def stock(self, lib: Library, books=5, users=2):
+        for i in range(books):
+            lib.add_book(Book(f"Title {i}", f"Author {i % 2}", f"isbn-{i}"))
+        for i in range(users):
+            lib.register_user(User(f"Patron {i}", f"u{i}"))
+
+    def feed_kinds(self) -> list:
+        with open(self.path('changes.jsonl'), encoding='utf-8') as f:
+            return [json.loads(line)['kind'] for line in f]
+
+class TransactionTest(LibraryTestCase):
+    def test_failed_batch_restores_records_stats_and_feed(self):
+        lib = self.library(change_feed=self.path('changes.jsonl'))
+        self.stock(lib)
+        published = len(self.feed_kinds())
+        before = lib.stats()
+
+        self.assertFalse(lib.borrow_many(["Title 0", "Title 1", "No such book"], "u0"))
+
+        self.assertFalse(lib._books["Title 0"].is_borrowed)
+        self.assertEqual(lib._books["Title 0"].borrow_count, 0)
+        self.assertEqual(lib._users["u0"].borrowed_books, [])
+        self.assertEqual(lib.stats(), before)
+        self.assertEqual(len(self.feed_kinds()), published)
+
+    def test_rollback_restores_indexes(self):
+        lib = self.library()
+        self.stock(lib)
+        with self.assertRaises(RuntimeError):
+            with lib.transaction():
+                lib.add_book(Book("New", "Someone", "isbn-new"))
+                lib.remove_book("Title 1")
+                raise RuntimeError("abort")
+        self.assertIsNone(lib.find_by_isbn("isbn-new"))
+        self.assertEqual(lib.find_by_author("Someone"), [])
+        self.assertIs(lib.find_by_isbn("isbn-1"), lib._books["Title 1"])
+        self.assertIn(lib._books["Title 1"], lib.find_by_author("Author 1"))
+        self.assertEqual(lib.stats()["total_books"], 5)
+
+    def test_inner_savepoint_rolls_back_alone(self):
+        lib = self.library()
+        self.stock(lib)
+        with lib.transaction():
+            lib.borrow_book("Title 0", "u0")
+            with self.assertRaises(ValueError):
+                with lib.transaction():
+                    lib.borrow_book("Title 1", "u0")
+                    raise ValueError("inner")
+        self.assertTrue(lib._books["Title 0"].is_borrowed)
+        self.assertFalse(lib._books["Title 1"].is_borrowed)
+        self.assertEqual(self.library()._users["u0"].borrowed_books, ["Title 0"])
+
+class FineLedgerTest(LibraryTestCase):
+    def owing_user(self, fine=7.5):
+        with open(self.path('users.json'), 'w', encoding='utf-8') as f:
+            json.dump([{"name": "A", "user_id": "u0", "borrowed_books": [], "total_fine": fine}], f)
+
+    def users_file_fine(self) -> float:
+        with open(self.path('users.json'), encoding='utf-8') as f:
+            return json.load(f)[0]['total_fine']
+
+    def test_load_does_not_write(self):
+        self.owing_user()
+        lib = self.library()
+        self.assertFalse(os.path.exists(self.path('users.fines.jsonl')))
+        self.assertEqual(lib.fine_statement("u0")[0]["note"], "Opening balance")
+        self.assertTrue(lib.pay_fine("u0", 2.5))
+        self.assertEqual([e['kind'] for e in lib.fine_statement("u0")], ['accrual', 'payment'])
+        self.assertEqual(self.library()._users["u0"].total_fine, 5.0)
+
+    def test_fines_in_one_transaction_are_counted_once(self):
+        for carried in (0, 7.5):
+            with self.subTest(carried=carried):
+                self.owing_user(carried)
+                if os.path.exists(self.path('users.fines.jsonl')):
+                    os.remove(self.path('users.fines.jsonl'))
+                lib = self.library()
+                self.stock(lib, users=0)
+                lib.borrow_book("Title 0", "u0", days_to_return=-3)
+                lib.borrow_book("Title 1", "u0", days_to_return=-3)
+                self.assertEqual(lib.return_many(["Title 0", "Title 1"], "u0"), (True, 30))
+                self.assertEqual(lib._fines.balance("u0"), 3000 + carried * 100)
+                self.assertEqual(self.library()._users["u0"].total_fine, 30 + carried)
+
+    def test_payments_write_only_the_ledger(self):
+        self.owing_user()
+        lib = self.library()
+        with open(self.path('users.json'), 'rb') as f:
+            saved = f.read()
+        self.assertTrue(lib.pay_fine("u0", 2.5))
+        self.assertTrue(lib.waive_fine("u0", 1))
+        with open(self.path('users.json'), 'rb') as f:
+            self.assertEqual(f.read(), saved)
+        self.assertEqual(self.library()._users["u0"].total_fine, 4.0)
+
+        checker = LibraryChecker(self.path('books.json'), self.path('users.json'))
+        self.assertEqual(checker.check(), {'stale_fine': 1})
+        checker.repair()
+        self.assertEqual(self.users_file_fine(), 4.0)
+
+    def test_ledger_is_written_before_the_data_files(self):
+        lib = self.library()
+        self.stock(lib, users=1)
+        lib.borrow_book("Title 0", "u0", days_to_return=-2)
+
+        def crash():
+            raise OSError("disk full")
+        lib._save_data = crash
+        with self.assertRaises(OSError):
+            lib.return_book("Title 0", "u0")
+        self.assertEqual(self.users_file_fine(), 0)
+        self.assertEqual(self.library()._users["u0"].total_fine, 10)  # The ledger kept the fine
+
+class CompressionTest(LibraryTestCase):
+    def test_compressed_save_and_load_round_trip(self):
+        lib = self.library(compression='bz2')
+        self.stock(lib, books=50, users=5)
+        lib.borrow_book("Title 3", "u1")
+        for name in ('books.json', 'users.json'):
+            self.assertEqual(detect_compression(self.path(name)), 'bz2')
+
+        reloaded = self.library()  # Compression is recognised when reading
+        self.assertEqual([b.to_dict() for b in reloaded._books.values()], [b.to_dict() for b in lib._books.values()])
+        self.assertEqual([u.to_dict() for u in reloaded._users.values()], [u.to_dict() for u in lib._users.values()])
+        self.assertEqual(reloaded.stats(), lib.stats())
+
+        reloaded.return_book("Title 3", "u1")  # Saved uncompressed unless asked otherwise
+        self.assertIsNone(detect_compression(self.path('books.json')))
+        self.assertFalse(self.library(compression='gzip')._books["Title 3"].is_borrowed)
+
+class LoadTest(LibraryTestCase):
+    def test_chunked_load_matches_single_stream(self):
+        lib = self.library()
+        self.stock(lib, books=300, users=40)
+        for i in range(40):
+            lib.borrow_book(f"Title {i}", f"u{i}")
+
+        single = self.library()
+        chunked = self.library(load_workers=3)
+        self.assertEqual(list(chunked._books), list(single._books))
+        self.assertEqual([b.to_dict() for b in chunked._books.values()],
+                         [b.to_dict() for b in single._books.values()])
+        self.assertEqual([u.to_dict() for u in chunked._users.values()],
+                         [u.to_dict() for u in single._users.values()])
+        self.assertEqual(chunked.suggest("title 1", 3), single.suggest("title 1", 3))
+        self.assertEqual(chunked.stats(), single.stats())
+
+class SnapshotTest(LibraryTestCase):
+    def test_snapshot_is_stable_across_writes(self):
+        lib = self.library()
+        self.stock(lib)
+        lib.borrow_book("Title 0", "u0")
+        with lib.snapshot() as snap:
+            lib.return_book("Title 0", "u0")
+            lib.borrow_book("Title 2", "u1")
+            lib.add_book(Book("Added later", "Someone"))
+            lib.remove_book("Title 3")
+            lib.register_user(User("Late", "u9"))
+
+            self.assertTrue(snap.get_book("Title 0").is_borrowed)
+            self.assertFalse(snap.get_book("Title 2").is_borrowed)
+            self.assertEqual(snap.get_user("u0").borrowed_books, ["Title 0"])
+            self.assertEqual(snap.get_user("u1").borrowed_books, [])
+            self.assertIsNone(snap.get_book("Added later"))
+            self.assertIsNotNone(snap.get_book("Title 3"))
+            self.assertIsNone(snap.get_user("u9"))
+            self.assertEqual(len(snap.books()), 5)
+
+        self.assertFalse(lib._books["Title 0"].is_borrowed)
+        self.assertIs(lib.find_by_isbn("isbn-2"), lib._books["Title 2"])
+        self.assertFalse(lib._snapshots)
+
+    def test_snapshot_refused_inside_transaction(self):
+        lib = self.library()
+        with self.assertRaises(RuntimeError):
+            with lib.transaction():
+                lib.snapshot()
+
+class BoundedUserStoreTest(LibraryTestCase):
+    def test_spilled_user_survives_eviction_and_write_back(self):
+        lib = self.library(max_user_bytes=2000)
+        self.stock(lib, books=3, users=50)
+        self.assertTrue(lib.borrow_book("Title 0", "u0"))
+        for i in range(1, 50):
+            lib._users.get(f"u{i}")  # Push u0 out of memory
+        self.assertNotIn("u0", lib._users._resident)
+        self.assertGreater(lib.user_cache_stats()["evictions"], 0)
+
+        self.assertEqual(lib._users.get("u0").borrowed_books, ["Title 0"])
+        self.assertTrue(lib.return_book("Title 0", "u0")[0])
+
+        reloaded = self.library()
+        self.assertEqual(reloaded._users["u0"].borrowed_books, [])
+        self.assertEqual(list(reloaded._users), [f"u{i}" for i in range(50)])
+
+    def test_rollback_reaches_evicted_user(self):
+        lib = self.library(max_user_bytes=2000)
+        self.stock(lib, books=3, users=50)
+        with self.assertRaises(RuntimeError):
+            with lib.transaction():
+                lib.borrow_book("Title 0", "u0")
+                for i in range(1, 50):
+                    lib._users.get(f"u{i}")
+                raise RuntimeError("abort")
+        self.assertEqual(lib._users.get("u0").borrowed_books, [])
+        self.assertFalse(lib._books["Title 0"].is_borrowed)
+
+    def test_snapshot_reads_spilled_users_as_they_were(self):
+        lib = self.library(max_user_bytes=2000)
+        self.stock(lib, books=3, users=50)
+        with lib.snapshot() as snap:
+            lib.borrow_book("Title 0", "u0")
+            for i in range(1, 50):
+                lib._users.get(f"u{i}")  # Evicts u0, writing its loan to the store's file
+            lib.pay_fine("u1", 1)
+            self.assertEqual(snap.get_user("u0").borrowed_books, [])
+            self.assertEqual(len(snap.users()), 50)
+        self.assertEqual(lib._users.get("u0").borrowed_books, ["Title 0"])
+
+    def test_payment_reaches_users_file_through_the_store(self):
+        with open(self.path('users.json'), 'w', encoding='utf-8') as f:
+            json.dump([{"name": f"P{i}", "user_id": f"u{i}", "borrowed_books": [], "total_fine": 5}
+                       for i in range(50)], f)
+        lib = self.library(max_user_bytes=2000)
+        self.assertTrue(lib.pay_fine("u0", 5))
+        for i in range(1, 50):
+            lib._users.get(f"u{i}")
+        lib.register_user(User("Late", "u50"))  # Any save writes the evicted payer back out
+        with open(self.path('users.json'), encoding='utf-8') as f:
+            self.assertEqual(json.load(f)[0]['total_fine'], 0)
+        self.assertEqual(lib.fine_statement("u0")[-1]["kind"], "payment")
+
+if __name__ == "__main__":
+    unittest.main()
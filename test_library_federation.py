@@ -0,0 +1,59 @@
+# test_library_federation.py
+import os
+import tempfile
+import unittest
+
+from library_federation import LibraryFederation
+from Library_Management_System_Final import Library, Book, User
+
+class LibraryFederationTest(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._dir.cleanup)
+        self.branches = {}
+        for name, titles in (("north", ["Dune", "Emma"]), ("south", ["Dune", "Beloved"])):
+            files = (self.path(f"{name}_books.json"), self.path(f"{name}_users.json"))
+            lib = Library(*files, record_events=False)
+            for title in titles:
+                lib.add_book(Book(title, "Author"))
+            self.branches[name] = files
+        lib = Library(*self.branches["south"], record_events=False)
+        lib.register_user(User("A", "u0"))
+        lib.borrow_book("Dune", "u0")
+
+    def path(self, name: str) -> str:
+        return os.path.join(self._dir.name, name)
+
+    def check_federation(self, federation: LibraryFederation, errors=()):
+        results = federation.search_book("e")
+        self.assertEqual([(name, book.title) for name, book in results],
+                         [("south", "Beloved"), ("north", "Dune"), ("south", "Dune"), ("north", "Emma")])
+        self.assertEqual(list(federation.errors), list(errors))
+
+        availability = federation.availability("Dune")
+        self.assertEqual(availability["north"], "Available")
+        self.assertTrue(availability["south"].startswith("Borrowed, due "))
+        self.assertEqual(federation.find_available("Dune"), ["north"])
+        self.assertEqual(federation.find_available("Beloved"), ["south"])
+
+    def test_process_mode_reports_failed_branch(self):
+        with LibraryFederation(self.branches) as federation:
+            self.check_federation(federation)
+            federation._pools["south"].shutdown()  # Branch process gone
+            self.assertEqual([name for name, _ in federation.search_book("Dune")], ["north"])
+            self.assertEqual(list(federation.errors), ["south"])
+
+    def test_thread_mode_reports_unloadable_branch(self):
+        broken = (self.path("broken_books.json"), self.path("broken_users.json"))
+        with open(broken[0], 'w', encoding='utf-8') as f:
+            f.write('[{"title": ')  # Cut off mid-record
+        with LibraryFederation(dict(self.branches, broken=broken), mode='thread') as federation:
+            self.check_federation(federation, errors=["broken"])
+            self.assertIn("JSONDecodeError", federation.errors["broken"])
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            LibraryFederation(self.branches, mode='fiber')
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+# test_library_fsck.py
+import io
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+import library_fsck
+from json_stream import JsonArrayWriter, iter_json_array
+from library_fsck import LibraryChecker
+
+def _book(title, borrowed=False, due=None, borrowed_date=None):
+    return {"title": title, "author": "A", "isbn": None, "is_borrowed": borrowed, "due_date": due,
+            "borrowed_date": borrowed_date, "borrow_count": 1}
+
+class LibraryCheckerTest(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._dir.cleanup)
+        self.books = os.path.join(self._dir.name, 'books.json')
+        self.users = os.path.join(self._dir.name, 'users.json')
+        books = [_book("Ok", True, "2025-01-15T00:00:00", "2025-01-01T00:00:00"),
+                 _book("Ok"),  # duplicate_book
+                 _book("Orphan", True, "2025-01-15T00:00:00"),  # orphan_loan
+                 _book("Stale", False, "2025-01-15T00:00:00"),  # stale_dates
+                 _book("Undated", True, None, "2025-01-01T00:00:00"),  # missing_due_date
+                 _book("Shelved"),  # unrecorded_loan
+                 _book("Shared", True, "2025-01-15T00:00:00")]
+        users = [{"name": "A", "user_id": "u0", "total_fine": 0,
+                  "borrowed_books": ["Ok", "Gone", "Shelved", "Shared"]},  # missing_book, unrecorded_loan
+                 {"name": "B", "user_id": "u1", "total_fine": -5,  # negative_fine
+                  "borrowed_books": ["Undated", "Shared"]},  # multiple_holders
+                 {"name": "C", "user_id": "u0", "total_fine": 0, "borrowed_books": []}]  # duplicate_user
+        for path, records in ((self.books, books), (self.users, users)):
+            with JsonArrayWriter(path) as out:  # One record per line, so --jobs can split it
+                for record in records:
+                    out.write(record)
+
+    def test_finds_every_category(self):
+        counts = LibraryChecker(self.books, self.users).check()
+        self.assertEqual(counts, {category: 1 for category in library_fsck.CATEGORIES if category != 'stale_fine'})
+
+    def test_parallel_check_matches_serial(self):
+        serial = LibraryChecker(self.books, self.users)
+        parallel = LibraryChecker(self.books, self.users, jobs=3)
+        self.assertEqual(parallel.check(), serial.check())
+        self.assertEqual(parallel.samples, serial.samples)
+
+    def test_repair_leaves_nothing_to_fix(self):
+        checker = LibraryChecker(self.books, self.users, jobs=2)
+        checker.check()
+        checker.repair()
+        self.assertEqual(LibraryChecker(self.books, self.users).check(), {})
+
+        books = {data["title"]: data for data in iter_json_array(self.books)}
+        self.assertEqual(len(books), 6)
+        self.assertFalse(books["Orphan"]["is_borrowed"])
+        self.assertIsNone(books["Stale"]["due_date"])
+        self.assertEqual(books["Undated"]["due_date"], "2025-01-15T00:00:00")
+        self.assertTrue(books["Shelved"]["is_borrowed"])
+        users = list(iter_json_array(self.users))
+        self.assertEqual([(u["user_id"], u["borrowed_books"], u["total_fine"]) for u in users],
+                         [("u0", ["Ok", "Shelved", "Shared"], 0), ("u1", ["Undated"], 0)])
+
+    def test_command_line_repair(self):
+        argv = ['library_fsck.py', '--books', self.books, '--users', self.users, '--jobs', '2', '--repair']
+        output = io.StringIO()
+        with mock.patch.object(sys, 'argv', argv), redirect_stdout(output):
+            library_fsck.main()
+        self.assertIn("missing_book: 1", output.getvalue())
+        self.assertIn("Repairs written.", output.getvalue())
+
+        output = io.StringIO()
+        with mock.patch.object(sys, 'argv', argv[:5]), redirect_stdout(output):
+            library_fsck.main()
+        self.assertIn("No problems found.", output.getvalue())
+
+if __name__ == "__main__":
+    unittest.main()
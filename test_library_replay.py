@@ -0,0 +1,68 @@
+# test_library_replay.py
+import gzip
+import json
+import os
+import tempfile
+import unittest
+
+from library_replay import RecordingLibrary, load_recording, replay, _shard
+from Library_Management_System_Final import Library, Book, User
+
+class ReplayTest(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._dir.cleanup)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self._dir.name, name)
+
+    def test_truncated_recording_keeps_complete_rows(self):
+        path = self.path('rec.jsonl.gz')
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            f.write(json.dumps({"version": 1}) + '\n')
+            for i in range(200):
+                f.write(json.dumps([i, "search_book", [f"T{i}"], {}, [], None]) + '\n')
+        with open(path, 'rb') as f:
+            data = f.read()
+        with open(path, 'wb') as f:
+            f.write(data[:len(data) * 2 // 3])  # Session killed mid-write
+        header, calls = load_recording(path)
+        self.assertTrue(header["truncated"])
+        self.assertTrue(0 < len(calls) < 200)
+        self.assertEqual([call[0] for call in calls], list(range(len(calls))))
+
+    def test_shards_keep_related_calls_together_and_wait_at_barriers(self):
+        calls = [[0, "borrow_book", ["Dune", "u1"], {}, True, None],
+                 [1, "borrow_book", ["Emma", "u2"], {}, True, None],
+                 [2, "return_book", ["Dune", "u1"], {}, [True, 0], None],
+                 [3, "borrow_book", ["111", "u3"], {}, True, None],
+                 [4, "stats", [], {}, {}, None],
+                 [5, "search_book", ["dun"], {}, [], None],
+                 [6, "return_book", ["Emma", "u2"], {}, [True, 0], None]]
+        phases = _shard(calls, 3, aliases=[("111", "Dune")])
+        self.assertEqual(phases[1:], [[[4]], [[5]], [[6]]])
+        self.assertEqual(sorted(phases[0]), [[0, 2, 3], [1]])
+
+    def test_parallel_replay_matches_recording(self):
+        lib = RecordingLibrary(Library(self.path('books.json'), self.path('users.json'), record_events=False),
+                               self.path('rec.jsonl.gz'))
+        for i in range(6):
+            lib.add_book(Book(f"Title {i}", "Author", f"isbn-{i}"))
+            lib.register_user(User(f"Patron {i}", f"u{i}"))
+        for round_ in range(5):
+            for i in range(6):
+                lib.borrow_book(f"isbn-{(i + round_) % 6}", f"u{i}")  # By barcode, returned by title
+            lib.search_book("title")
+            for i in range(6):
+                lib.return_book(f"Title {(i + round_) % 6}", f"u{i}")
+            lib.stats()
+        lib.close()
+
+        for _ in range(5):
+            report = replay(self.path('rec.jsonl.gz'), speed=None, threads=3)
+            self.assertEqual(report["divergences"], 0, report["divergence_examples"])
+            self.assertEqual((report["calls"], report["unchecked"]), (82, 5))
+        self.assertEqual(replay(self.path('rec.jsonl.gz'), speed=None)["unchecked"], 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+# test_library_replica.py
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from change_feed import read_checkpoint
+from library_replica import LibraryReplica
+from Library_Management_System_Final import Library, Book, User
+
+class LibraryReplicaTest(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._dir.cleanup)
+        self.files = {name: os.path.join(self._dir.name, name)
+                      for name in ('books.json', 'users.json', 'changes.jsonl')}
+        self.lib = Library(self.files['books.json'], self.files['users.json'],
+                           change_feed=self.files['changes.jsonl'], record_events=False)
+        self.lib.add_book(Book("Dune", "Herbert"))
+        self.lib.add_book(Book("Emma", "Austen"))
+        self.lib.register_user(User("A", "u0"))
+
+    def replica(self) -> LibraryReplica:
+        return LibraryReplica(self.files['changes.jsonl'], self.files['books.json'], self.files['users.json'])
+
+    def test_starts_from_checkpoint_and_catches_up(self):
+        replica = self.replica()
+        self.assertEqual(replica.lag()["changes_behind"], 0)
+        self.assertLessEqual(read_checkpoint(self.files['changes.jsonl']), replica.lag()["applied_seq"])
+
+        self.lib.borrow_book("Dune", "u0")
+        self.lib.remove_book("Emma")
+        lag = replica.lag()
+        self.assertEqual(lag["changes_behind"], 2)
+        self.assertGreater(lag["seconds_behind"], 0)
+        self.assertFalse(replica.get_book("Dune").is_borrowed)
+
+        self.assertEqual(replica.poll(), 2)
+        self.assertTrue(replica.get_book("Dune").is_borrowed)
+        self.assertIsNone(replica.get_book("Emma"))
+        self.assertEqual(replica.get_user("u0").borrowed_books, ["Dune"])
+        self.assertEqual(replica.lag(), {"applied_seq": self.lib._feed.seq, "primary_seq": self.lib._feed.seq,
+                                         "changes_behind": 0, "seconds_behind": 0.0})
+
+    def test_half_written_change_waits(self):
+        replica = self.replica()
+        change = json.dumps({"seq": self.lib._feed.seq + 1, "ts": datetime.now().isoformat(),
+                             "kind": "user_registered", "books": [], "users": [User("B", "u1").to_dict()],
+                             "removed_books": [], "removed_users": []}) + '\n'
+        with open(self.files['changes.jsonl'], 'a', encoding='utf-8') as f:
+            f.write(change[:20])  # Primary is mid-write
+        self.assertEqual(replica.poll(), 0)
+        self.assertIsNone(replica.get_user("u1"))
+        with open(self.files['changes.jsonl'], 'a', encoding='utf-8') as f:
+            f.write(change[20:])
+        self.assertEqual(replica.poll(), 1)
+        self.assertEqual(replica.get_user("u1").name, "B")
+
+    def test_new_replica_matches_primary(self):
+        self.lib.borrow_book("Emma", "u0")
+        replica = self.replica()
+        self.assertEqual(replica.lag()["applied_seq"], self.lib._feed.seq)
+        self.assertEqual([book.to_dict() for book in replica.search_book("")],
+                         [book.to_dict() for book in self.lib.search_book("")])
+        self.assertEqual(replica.get_user("u0").borrowed_books, ["Emma"])
+
+    def test_payment_after_last_save_reaches_new_replica(self):
+        self.lib.borrow_book("Dune", "u0", days_to_return=-1)
+        self.lib.return_book("Dune", "u0")
+        self.lib.pay_fine("u0", 2)  # Written to the ledger and the feed, not to users.json
+        self.assertEqual(self.replica().get_user("u0").total_fine, 3.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+# test_library_stats.py
+import random
+import unittest
+
+from library_stats import CirculationStats, _SortedValues
+
+class SortedValuesTest(unittest.TestCase):
+    def test_matches_a_sorted_list_through_splits_and_removals(self):
+        rng = random.Random(7)
+        values, expected = _SortedValues(), set()
+        for _ in range(5000):
+            value = rng.randrange(3000)
+            if value in expected:
+                values.remove(value)
+                expected.discard(value)
+            else:
+                values.add(value)
+                expected.add(value)
+        self.assertGreater(len(values._runs), 1)
+        self.assertEqual(list(reversed(values)), sorted(expected, reverse=True))
+
+class CirculationStatsTest(unittest.TestCase):
+    def test_top_fines_follow_changes_in_cents(self):
+        stats = CirculationStats()
+        for i in range(10):
+            stats.fine_changed(f"u{i}", 0.1)
+        stats.fine_changed("big", 25)
+        stats.fine_changed("mid", 12.5)
+        stats.fine_changed("big", 0)
+        self.assertEqual(stats.top_fines(2), [("mid", 12.5), ("u0", 0.1)])
+        self.assertEqual(stats.summary()["outstanding_fines"], 13.5)
+        stats.user_removed("mid")
+        self.assertEqual(stats.top_fines(1), [("u0", 0.1)])
+
+    def test_counters_and_top_titles(self):
+        stats = CirculationStats()
+        for title, count in (("A", 3), ("B", 0), ("C", 5)):
+            stats.book_added(title, count)
+        stats.book_borrowed("B")
+        stats.book_borrowed("A")
+        self.assertEqual(stats.top_titles(2), [("C", 5), ("A", 4)])
+        self.assertAlmostEqual(stats.utilization(), 2 / 3)
+        stats.book_returned("A")
+        stats.book_removed("C")
+        self.assertEqual(stats.top_titles(5), [("A", 4), ("B", 1)])
+        self.assertEqual(stats.summary()["available_books"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+# test_migrate_library_data.py
+import json
+import os
+import tempfile
+import unittest
+
+from fine_ledger import FineLedger
+from json_stream import iter_json_array
+from migrate_library_data import Migration, detect_schema
+
+class MigrationTest(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._dir.cleanup)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self._dir.name, name)
+
+    def migrate(self, source: str, target: str, books: list, users: list) -> tuple:
+        for name, records in (('books.json', books), ('users.json', users)):
+            with open(self.path(name), 'w', encoding='utf-8') as f:
+                json.dump(records, f)
+        report = Migration(source, target).run(self.path('books.json'), self.path('users.json'),
+                                               self.path('out_books.json'), self.path('out_users.json'))
+        return (report, list(iter_json_array(self.path('out_books.json'))),
+                list(iter_json_array(self.path('out_users.json'))))
+
+    def test_loans_of_dropped_duplicates_are_removed(self):
+        books = [{"title": "Pride", "author": "Austen", "isbn": "X1", "is_borrowed": True},
+                 {"title": "Emma", "author": "Austen", "isbn": "X1", "is_borrowed": True}]
+        users = [{"name": "A", "user_id": "u0", "borrowed_books": ["Pride", "Emma"], "total_fine": 0}]
+        report, books, users = self.migrate('final', 'fine', books, users)
+        self.assertEqual((report["dropped"], report["loans_dropped"]), (1, 1))
+        self.assertEqual([book["title"] for book in books], ["Pride"])
+        self.assertEqual(users[0]["borrowed_books_isbns"], ["X1"])
+
+    def test_round_trip_to_final_and_back(self):
+        books = [{"title": "Dune", "author": "Herbert", "isbn": "111", "is_borrowed": True},
+                 {"title": "Dune", "author": "Herbert", "isbn": "222", "is_borrowed": False}]
+        users = [{"name": "A", "user_id": "u0", "borrowed_books_isbns": ["111"]}]
+        report, books, users = self.migrate('basic', 'final', books, users)
+        self.assertEqual(report["renamed"], 1)
+        self.assertEqual([book["title"] for book in books], ["Dune", "Dune [222]"])
+        self.assertIsNotNone(books[0]["due_date"])  # Undated loans start at migration time
+        self.assertEqual(users[0]["borrowed_books"], ["Dune"])
+        self.assertEqual(detect_schema(self.path('out_books.json'), self.path('out_users.json')), 'final')
+
+        report, books, users = self.migrate('final', 'basic', books, users)
+        self.assertEqual([book["isbn"] for book in books], ["111", "222"])
+        self.assertEqual(users[0], {"name": "A", "user_id": "u0", "borrowed_books_isbns": ["111"]})
+
+    def test_fines_come_from_the_ledger(self):
+        ledger = FineLedger(self.path('users.fines.jsonl'))
+        ledger.accrue("u0", 750, 'Opening balance')
+        ledger.pay("u0", 250)  # Paid after users.json was last saved
+        users = [{"name": "A", "user_id": "u0", "borrowed_books": [], "total_fine": 7.5},
+                 {"name": "B", "user_id": "u1", "borrowed_books": [], "total_fine": 1.0}]
+        _, _, users = self.migrate('final', 'fine', [], users)
+        self.assertEqual([user["total_fine"] for user in users], [5.0, 1.0])
+
+if __name__ == "__main__":
+    unittest.main()
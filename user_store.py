@@ -0,0 +1,181 @@
+# user_store.py
+import json
+import os
+import sqlite3
+import sys
+from collections import OrderedDict
+from typing import List, Dict, Iterator
+
+def _sizeof(user) -> int:
+    # Rough resident size: the object, its attributes and the titles it holds
+    state = vars(user)
+    size = sys.getsizeof(user) + sys.getsizeof(state)
+    for value in state.values():
+        size += sys.getsizeof(value)
+        if isinstance(value, list):
+            size += sum(sys.getsizeof(item) for item in value)
+    return size
+
+# Read-only view of the spilled users as they were when UserStore.snapshot() was called
+class UserSnapshot:
+    def __init__(self, path: str, decode):
+        self._decode = decode
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)  # Used by reader threads
+        self._db.execute('BEGIN')
+        self._db.execute('SELECT 1 FROM users LIMIT 1').fetchall()  # Starts the read, fixing what it sees
+
+    def get(self, user_id: str, default=None):
+        row = self._db.execute('SELECT data FROM users WHERE user_id = ?', (user_id,)).fetchone()
+        return self._decode(json.loads(row[0])) if row else default
+
+    def values(self) -> Iterator:
+        for (data,) in self._db.execute('SELECT data FROM users ORDER BY rowid'):
+            yield self._decode(json.loads(data))
+
+    def __len__(self):
+        return self._db.execute('SELECT count(*) FROM users').fetchone()[0]
+
+    def close(self):
+        self._db.close()
+
+# Users kept in memory up to a byte budget, least recently used ones spilled to SQLite
+class UserStore:
+    def __init__(self, path: str, max_bytes: int, decode):
+        self._path = path
+        self._max_bytes = max_bytes
+        self._decode = decode  # Saved dict -> User
+        self._resident: OrderedDict = OrderedDict()  # User ID -> User, least recently used first
+        self._sizes: Dict[str, int] = {}  # User ID -> estimated bytes while resident
+        self._bytes = 0
+        self._dirty = set()  # Resident users changed since they were last written out
+        self._cold: List[tuple] = []  # Rows from add_cold() waiting to be inserted
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)  # Rebuilt from users.json on every start
+        self._db = sqlite3.connect(path)
+        self._db.execute('PRAGMA journal_mode=WAL')  # Snapshots keep reading while evictions write
+        self._db.execute('PRAGMA synchronous=OFF')  # Only a cache, users.json is the durable copy
+        self._db.execute('CREATE TABLE users (user_id TEXT PRIMARY KEY, data TEXT NOT NULL)')
+
+    def _encode(self, user) -> tuple:
+        return user.user_id, json.dumps(user.to_dict(), ensure_ascii=False)
+
+    def _write(self, user):
+        # Updating in place keeps the rowid, so saves stay in registration order
+        self._db.execute('INSERT INTO users (user_id, data) VALUES (?, ?) '
+                         'ON CONFLICT(user_id) DO UPDATE SET data = excluded.data',
+                         self._encode(user))
+
+    def add_cold(self, user):
+        # Bulk loading: straight to disk in batches, nothing is cached yet
+        self._cold.append(self._encode(user))
+        if len(self._cold) >= 10000:
+            self._insert_cold()
+
+    def _insert_cold(self):
+        self._db.executemany('INSERT OR REPLACE INTO users (user_id, data) VALUES (?, ?)', self._cold)
+        self._cold.clear()
+
+    def _admit(self, user, dirty: bool):
+        user_id = user.user_id
+        size = _sizeof(user)
+        self._bytes += size - self._sizes.get(user_id, 0)
+        self._sizes[user_id] = size
+        self._resident[user_id] = user
+        self._resident.move_to_end(user_id)
+        if dirty:
+            self._dirty.add(user_id)
+        while self._bytes > self._max_bytes and len(self._resident) > 1:
+            cold_id, cold = self._resident.popitem(last=False)
+            self._bytes -= self._sizes.pop(cold_id)
+            if cold_id in self._dirty:
+                self._dirty.discard(cold_id)
+                self._write(cold)
+            self.evictions += 1
+
+    def get(self, user_id: str, default=None):
+        user = self._resident.get(user_id)
+        if user is not None:
+            self.hits += 1
+            self._resident.move_to_end(user_id)
+            return user
+        self.misses += 1
+        row = self._db.execute('SELECT data FROM users WHERE user_id = ?', (user_id,)).fetchone()
+        if row is None:
+            return default
+        user = self._decode(json.loads(row[0]))
+        self._admit(user, dirty=False)
+        return user
+
+    def touch(self, user):
+        # Called before a user is changed in place; also re-admits one evicted meanwhile
+        self._admit(user, dirty=True)
+
+    def __getitem__(self, user_id: str):
+        user = self.get(user_id)
+        if user is None:
+            raise KeyError(user_id)
+        return user
+
+    def __setitem__(self, user_id: str, user):
+        self._write(user)  # Written straight away so its row keeps registration order
+        self._admit(user, dirty=False)
+
+    def __delitem__(self, user_id: str):
+        resident = self._resident.pop(user_id, None)
+        if resident is not None:
+            self._bytes -= self._sizes.pop(user_id)
+            self._dirty.discard(user_id)
+        deleted = self._db.execute('DELETE FROM users WHERE user_id = ?', (user_id,)).rowcount
+        if resident is None and not deleted:
+            raise KeyError(user_id)
+
+    def __contains__(self, user_id: str) -> bool:
+        return (user_id in self._resident or
+                self._db.execute('SELECT 1 FROM users WHERE user_id = ?', (user_id,)).fetchone() is not None)
+
+    def __len__(self):
+        self.flush()
+        return self._db.execute('SELECT count(*) FROM users').fetchone()[0]
+
+    def values(self) -> Iterator:
+        # Every user in registration order; cold ones are decoded without being cached
+        self.flush()
+        for user_id, data in self._db.execute('SELECT user_id, data FROM users ORDER BY rowid'):
+            user = self._resident.get(user_id)
+            yield user if user is not None else self._decode(json.loads(data))
+
+    def encoded(self) -> Iterator[str]:
+        # Every user's JSON in registration order as stored, only changed users are encoded again
+        self.flush()
+        for (data,) in self._db.execute('SELECT data FROM users ORDER BY rowid'):
+            yield data
+
+    def flush(self):
+        self._insert_cold()
+        for user_id in self._dirty:
+            self._write(self._resident[user_id])
+        self._dirty.clear()
+        self._db.commit()
+
+    def snapshot(self) -> UserSnapshot:
+        self.flush()
+        return UserSnapshot(self._path, self._decode)
+
+    def metrics(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "resident": len(self._resident),
+            "resident_bytes": self._bytes,
+            "max_bytes": self._max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+    def close(self):
+        self._db.close()